@@ -3,6 +3,10 @@ ASGI config for ZapuzaDjangoBasicApp project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI server (``uvicorn ZapuzaDjangoBasicApp.asgi:application``)
+to keep the live count streams of ``/api/live-counts/`` open; they share one
+in-process broadcaster, so run a single worker (see ``basicApp.live``).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -23,7 +23,11 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'basicApp.middleware.CompressionMiddleware',
+    'basicApp.middleware.StaticFilesMiddleware',
+    'basicApp.middleware.QueryProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'basicApp.middleware.GuestCookieMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -31,6 +35,22 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Gzip of HTML/JSON/text responses (basicApp.middleware.CompressionMiddleware).
+RESPONSE_COMPRESSION = {
+    'ENABLED': True,
+    'MIN_SIZE': 860,
+}
+
+# Per-request query profiling (basicApp.middleware.QueryProfilingMiddleware).
+# In production keep it enabled with a low SAMPLE_RATE, e.g. 0.01.
+QUERY_PROFILING = {
+    'ENABLED': DEBUG,
+    'SAMPLE_RATE': 1.0,
+    'N_PLUS_ONE_THRESHOLD': 5,
+    'LOG': True,
+    'HEADER': True,
+}
+
 ROOT_URLCONF = 'ZapuzaDjangoBasicApp.urls'
 
 TEMPLATES = [
@@ -68,6 +88,67 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'zapuza-default',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    'filebased': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+        'TIMEOUT': 3600,
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+        },
+    },
+}
+
+# Which cache alias each basicApp.cache namespace lives in (default otherwise).
+CACHE_NAMESPACES = {
+    'trending': 'default',
+    'analytics': 'filebased',
+    'ratelimit': 'default',
+    'counts': 'default',
+    # Deletions reach other processes' sitemaps through this version: share it.
+    'catalog': 'default',
+    'autocomplete': 'default',
+}
+
+
+# Scroll-feed lists built by `manage.py precompute_recommendations`; lists
+# older than MAX_AGE seconds are ignored and the feed is computed live.
+PRECOMPUTED_RECOMMENDATIONS = {
+    'TOP_N': 100,
+    'MAX_AGE': 6 * 60 * 60,
+}
+
+
+# Write limits per client (member, signed guest cookie, or IP), each also
+# capped per IP; see basicApp.ratelimit. Counters live in the cache,
+# so use a shared backend (Redis/Memcached) when running several processes.
+RATELIMITS = {
+    'reaction': {'RATE': '30/m', 'BY': 'user'},
+    'comment': {'RATE': '10/m', 'BY': 'user'},
+    'view': {'RATE': '120/m', 'BY': 'session'},
+}
+
+
+# View/like/dislike counters of hot posts spread over SHARDS rows per blog
+# (basicApp.counters). Off by default; when on, run ``manage.py
+# fold_counters`` periodically to move the deltas into the Blogs columns.
+SHARDED_COUNTERS = {
+    'ENABLED': False,
+    'SHARDS': 8,
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -107,9 +188,34 @@ STATIC_URL = '/static/'
 # `STATIC_ROOT` must be a separate directory where `collectstatic` will place files.
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# Outside development `collectstatic` writes content-hashed names plus .gz
+# copies, served by basicApp.middleware.StaticFilesMiddleware with
+# far-future caching. Run `manage.py collectstatic` on every deploy.
+STORAGES = {
+    # Uploads are stored once per distinct content (basicApp.storage).
+    'default': {
+        'BACKEND': 'basicApp.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'basicApp.storage.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# How basicApp.media.serve_media sends files: 'django' (FileResponse,
+# sendfile() under gunicorn/uWSGI), 'x-sendfile' (Apache/lighttpd) or
+# 'x-accel-redirect' (nginx), which needs an internal location at ACCEL_PREFIX:
+#     location /protected-media/ { internal; alias /path/to/media/; }
+MEDIA_SERVING = {
+    'BACKEND': 'django',
+    'ACCEL_PREFIX': '/protected-media/',
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -123,3 +229,20 @@ EMAIL_HOST_USER = 'ramdomlassi@gmail.com'
 EMAIL_HOST_PASSWORD = 'qnqr whck wify iuwd'
 
 AUTH_USER_MODEL = 'accounts.CustomUser'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'basicApp.profiling': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
@@ -14,16 +14,18 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static  # new
+
+from basicApp.media import serve_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('basicApp.urls')),
     path('accounts/', include('accounts.urls')),
-
+    # Uploaded files, in every environment; see basicApp.media for offloading to nginx/Apache.
+    re_path(rf'^{re.escape(settings.MEDIA_URL.lstrip("/"))}(?P<path>.+)$', serve_media, name='media'),
 ]
-if settings.DEBUG:  # new
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
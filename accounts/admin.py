@@ -2,4 +2,11 @@ from django.contrib import admin
 from .models import CustomUser
 # Register your models here.
 
-admin.site.register(CustomUser)
\ No newline at end of file
+
+@admin.register(CustomUser)
+class CustomUserAdmin(admin.ModelAdmin):
+    list_display = ('username', 'email', 'is_active', 'is_verified', 'is_staff', 'date_joined')
+    list_filter = ('is_active', 'is_verified', 'is_staff')
+    # Also what the author autocomplete of the blog admin searches.
+    search_fields = ('username', 'email')
+    show_full_result_count = False
@@ -11,8 +11,16 @@ from django.core.paginator import Paginator
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import ValidationError
 from django.db.models import Sum, Count
-from basicApp.models import Blogs, BlogComment, BlogReaction
+from django.db.models.functions import TruncDate
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from django.utils import timezone
+from datetime import timedelta
+import csv
+from basicApp.models import Blogs, BlogComment, BlogInteraction, BlogReaction, BlogViewSketch
+from basicApp import analytics
 
 # Create your views here.
 def login_view(request):
@@ -89,6 +97,10 @@ def dashboard(request):
         reaction='like'
     ).count()
 
+    # Distinct readers across all the user's blogs (HyperLogLog union, so a
+    # reader of several posts counts once).
+    unique_readers, unique_readers_today = BlogViewSketch.objects.unique_viewers(blog__author=user)
+
     # ---- Recent Blogs ----
     recent_blogs = user_blogs.order_by('-created')[:5]
 
@@ -106,6 +118,8 @@ def dashboard(request):
         'total_views': total_views,
         'total_comments': total_comments,
         'total_likes': total_likes,
+        'unique_readers': unique_readers,
+        'unique_readers_today': unique_readers_today,
         'recent_blogs': recent_blogs,
         'most_viewed_count': most_viewed_count,
         'total_earnings': total_earnings,
@@ -117,6 +131,137 @@ def dashboard(request):
 
 
 
+# ---- Stats export ----
+
+EXPORT_CHUNK_SIZE = 500
+EXPORT_MAX_DAYS = 365
+EXPORT_HEADER = [
+    'blog_id', 'title', 'category', 'created', 'views', 'likes', 'dislikes', 'comments',
+    'day', 'day_views', 'day_likes', 'day_dislikes', 'day_comments',
+]
+
+
+class Echo:
+    """File-like object for csv.writer that hands each row back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def stats_rows(user, since):
+    """
+    One row per blog and day with interactions since ``since`` (one row with an
+    empty day for blogs without any). Blogs are read ``EXPORT_CHUNK_SIZE`` at a
+    time and the daily counts are aggregated per chunk, so memory stays flat.
+    """
+    yield EXPORT_HEADER
+    blogs = (
+        Blogs.objects.filter(author=user)
+        .order_by('-created')
+        .values_list('id', 'title', 'category', 'created', 'views', 'likes_count', 'dislikes_count', 'comments_count')
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    for chunk in _chunks(blogs, EXPORT_CHUNK_SIZE):
+        daily = {}
+        rows = (
+            BlogInteraction.objects.filter(blog_id__in=[blog[0] for blog in chunk], created__gte=since)
+            .annotate(day=TruncDate('created'))
+            .values_list('blog_id', 'day', 'interaction_type')
+            .annotate(n=Count('id'))
+            .order_by()
+        )
+        for blog_id, day, interaction_type, n in rows:
+            daily.setdefault(blog_id, {}).setdefault(day, {})[interaction_type] = n
+
+        for blog_id, title, category, created, *counters in chunk:
+            totals = [blog_id, title, category, created.isoformat(), *counters]
+            days = daily.get(blog_id)
+            if not days:
+                yield totals + ['', 0, 0, 0, 0]
+                continue
+            for day in sorted(days, reverse=True):
+                counts = days[day]
+                yield totals + [day.isoformat()] + [
+                    counts.get(interaction_type, 0) for interaction_type in ('view', 'like', 'dislike', 'comment')
+                ]
+
+
+@login_required(login_url='/accounts/login/')
+def export_stats(request):
+    try:
+        days = min(max(int(request.GET.get('days', 30)), 1), EXPORT_MAX_DAYS)
+    except ValueError:
+        days = 30
+    since = timezone.now() - timedelta(days=days)
+
+    writer = csv.writer(Echo())
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in stats_rows(request.user, since)),
+        content_type='text/csv',
+    )
+    filename = f'{request.user.username}-stats-{timezone.localdate().isoformat()}.csv'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+# ---- Trends ----
+
+def _parse_moment(value, default):
+    if not value:
+        return default
+    moment = parse_datetime(value)
+    if moment is None:
+        raise ValueError(f'Invalid datetime: {value}')
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+@login_required(login_url='/accounts/login/')
+def stats_timeseries(request):
+    """
+    Interaction counts of the author's blogs (or of ``?blog=<id>``) per
+    ``?bucket=hour|day|week`` between ``?start`` and ``?end`` (ISO datetimes,
+    last 30 days by default), at most ``?max_points`` points.
+    """
+    bucket = request.GET.get('bucket', 'day')
+    if bucket not in analytics.BUCKETS:
+        return JsonResponse({'error': f'bucket must be one of {", ".join(analytics.BUCKETS)}'}, status=400)
+    try:
+        end = _parse_moment(request.GET.get('end'), timezone.now())
+        start = _parse_moment(request.GET.get('start'), end - timedelta(days=analytics.DEFAULT_DAYS))
+        max_points = min(max(int(request.GET.get('max_points', analytics.DEFAULT_MAX_POINTS)), 1), analytics.MAX_POINTS)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    if start >= end:
+        return JsonResponse({'error': 'start must be before end'}, status=400)
+
+    blog_id = request.GET.get('blog')
+    if blog_id:
+        try:
+            if not Blogs.objects.filter(id=blog_id, author=request.user).exists():
+                return JsonResponse({'error': 'Blog not found'}, status=404)
+        except ValidationError:
+            return JsonResponse({'error': 'Blog not found'}, status=404)
+
+    try:
+        data = analytics.time_series(request.user, start, end, bucket, blog_id or None, max_points)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse(data)
+
+
 @login_required(login_url='/accounts/login/')
 def profile(request):
     if request.method == 'POST':
@@ -148,13 +293,11 @@ def comments(request):
     total_comments = user_comments.count()
     paginator = Paginator(user_comments, 10)  # adjust per page
     page = request.GET.get('page', 1)
-    print(user_comments)
     try:
         comments_page = paginator.page(page)
     except:
         comments_page = paginator.page(paginator.num_pages)
 
-    print(comments_page)
     context = {
         'comments': comments_page,
         'total_comments': total_comments,
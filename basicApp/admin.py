@@ -1,8 +1,157 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connection
+from django.utils.functional import cached_property
+
+from .counters import recount_counters
+from .deletion import delete_blogs_now, suppress_counter_signals
 from .models import Blogs, BlogReaction, BlogComment, BlogInteraction
-# Register your models here.
 
-admin.site.register(Blogs)
-admin.site.register(BlogReaction)
-admin.site.register(BlogComment)
-admin.site.register(BlogInteraction)
\ No newline at end of file
+# Below this many rows an exact COUNT(*) is cheap enough.
+EXACT_COUNT_LIMIT = 100_000
+
+
+def estimated_row_count(model):
+    """The planner's row estimate for ``model``'s table, ``None`` when unavailable."""
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [table])
+            elif connection.vendor == 'mysql':
+                cursor.execute(
+                    'SELECT table_rows FROM information_schema.tables '
+                    'WHERE table_schema = DATABASE() AND table_name = %s', [table],
+                )
+            elif connection.vendor == 'sqlite':
+                # Filled in by ANALYZE; the first number is the row count.
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+            else:
+                return None
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if not row or row[0] is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    return estimate if estimate > 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Uses the table statistics instead of ``COUNT(*)`` for unfiltered
+    changelists of big tables. Filtered lists still count exactly.
+    """
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            estimate = estimated_row_count(self.object_list.model)
+            if estimate is not None and estimate > EXACT_COUNT_LIMIT:
+                return estimate
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+    def get_actions(self, request):
+        # The stock "delete selected" collects and lists every cascaded row first.
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+
+@admin.register(Blogs)
+class BlogsAdmin(LargeTableAdmin):
+    list_display = ('title', 'author', 'category', 'created', 'views', 'likes_count', 'dislikes_count', 'comments_count')
+    list_select_related = ('author',)
+    list_filter = ('category',)
+    search_fields = ('title',)
+    autocomplete_fields = ('author',)
+    date_hierarchy = 'created'
+    readonly_fields = ('updated',)
+    actions = ['recount', 'reset_views', 'delete_with_dependents']
+
+    def get_queryset(self, request):
+        # The changelist never shows the body; the change form loads it on access.
+        return super().get_queryset(request).defer('content')
+
+    @admin.action(description='Recount likes, dislikes and comments')
+    def recount(self, request, queryset):
+        updated = recount_counters(queryset)
+        self.message_user(request, f'Recounted {updated} blogs.', messages.SUCCESS)
+
+    @admin.action(description='Reset views to zero')
+    def reset_views(self, request, queryset):
+        updated = queryset.update(views=0)
+        self.message_user(request, f'Reset views of {updated} blogs.', messages.SUCCESS)
+
+    @admin.action(description='Delete selected blogs with their dependents')
+    def delete_with_dependents(self, request, queryset):
+        counts = delete_blogs_now(queryset.values_list('id', flat=True))
+        self.message_user(
+            request, 'Deleted ' + ', '.join(f'{n} {label}' for label, n in counts.items()), messages.SUCCESS,
+        )
+
+
+class DependentAdmin(LargeTableAdmin):
+    """Reactions and comments: deleting recounts each affected blog once."""
+    list_select_related = ('blog', 'user')
+    raw_id_fields = ('blog', 'user')
+    date_hierarchy = 'created'
+    actions = ['delete_and_recount']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('blog__content')
+
+    @admin.action(description='Delete selected and recount their blogs')
+    def delete_and_recount(self, request, queryset):
+        blog_ids = list(queryset.order_by().values_list('blog_id', flat=True).distinct())
+        with suppress_counter_signals():
+            deleted = queryset.delete()[0]
+        recount_counters(Blogs.objects.filter(id__in=blog_ids))
+        self.message_user(request, f'Deleted {deleted} rows, recounted {len(blog_ids)} blogs.', messages.SUCCESS)
+
+
+@admin.register(BlogReaction)
+class BlogReactionAdmin(DependentAdmin):
+    list_display = ('reaction', 'user', 'blog', 'created')
+    list_filter = ('reaction',)
+
+
+@admin.register(BlogComment)
+class BlogCommentAdmin(DependentAdmin):
+    list_display = ('short_text', 'user', 'blog', 'created')
+    search_fields = ('text',)
+
+    @admin.display(description='Text')
+    def short_text(self, obj):
+        return obj.text[:80]
+
+
+@admin.register(BlogInteraction)
+class BlogInteractionAdmin(LargeTableAdmin):
+    list_display = ('interaction_type', 'blog_title', 'user', 'session_key', 'created')
+    list_select_related = ('blog', 'user')
+    list_filter = ('interaction_type',)
+    raw_id_fields = ('blog', 'user')
+    date_hierarchy = 'created'
+    actions = ['delete_fast']
+
+    @admin.display(description='Blog', ordering='blog__title')
+    def blog_title(self, obj):
+        return obj.blog.title
+
+    def get_queryset(self, request):
+        # Only the columns the changelist shows; blog content can be large.
+        return super().get_queryset(request).defer('blog__content')
+
+    @admin.action(description='Delete selected interactions')
+    def delete_fast(self, request, queryset):
+        # No signals or dependents, so this is a single DELETE.
+        deleted = queryset.delete()[0]
+        self.message_user(request, f'Deleted {deleted} interactions.', messages.SUCCESS)
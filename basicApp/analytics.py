@@ -0,0 +1,111 @@
+"""
+Interaction time series for the author dashboard.
+
+Interactions are counted per bucket (hour, day or week) and type in the
+database; the dense ``(buckets, types)`` matrix is then downsampled to at
+most ``max_points`` rows by summing runs of neighbouring buckets, so a year
+of hourly data still comes back as a chart-sized payload. Ranges are
+aligned to whole buckets, which also makes consecutive requests share a
+cache entry.
+"""
+import math
+from datetime import timedelta
+
+import numpy as np
+from django.db.models import Count
+from django.db.models.functions import TruncDay, TruncHour, TruncWeek
+from django.utils import timezone
+
+from .cache import get_or_compute
+from .models import BlogInteraction
+from .recommendations import INTERACTION_TYPES, TYPE_INDEX
+
+BUCKETS = {
+    'hour': (TruncHour, timedelta(hours=1)),
+    'day': (TruncDay, timedelta(days=1)),
+    'week': (TruncWeek, timedelta(weeks=1)),
+}
+DEFAULT_DAYS = 30
+DEFAULT_MAX_POINTS = 200
+MAX_POINTS = 1000
+MAX_BUCKETS = 24 * 366 * 2
+CACHE_TIMEOUT = 60
+
+
+def floor_to_bucket(moment, bucket):
+    moment = timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+    if bucket in ('day', 'week'):
+        moment = moment.replace(hour=0)
+    if bucket == 'week':
+        moment -= timedelta(days=moment.weekday())
+    return moment
+
+
+def align_range(start, end, bucket):
+    """``[start, end)`` widened to whole buckets, and the number of buckets."""
+    step = BUCKETS[bucket][1]
+    start = floor_to_bucket(start, bucket)
+    aligned_end = floor_to_bucket(end, bucket)
+    if aligned_end < end:
+        aligned_end += step
+    return start, aligned_end, max(math.ceil((aligned_end - start) / step), 1)
+
+
+def bucket_counts(queryset, start, buckets, bucket):
+    """Dense ``(buckets, types)`` counts matrix of ``queryset`` from ``start`` on."""
+    trunc, step = BUCKETS[bucket]
+    counts = np.zeros((buckets, len(INTERACTION_TYPES)), dtype=np.int64)
+    rows = (
+        queryset.annotate(bucket=trunc('created'))
+        .values_list('bucket', 'interaction_type')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    for moment, interaction_type, n in rows:
+        index = round((moment - start) / step)
+        if 0 <= index < buckets:
+            counts[index, TYPE_INDEX[interaction_type]] += n
+    return counts
+
+
+def downsample(counts, max_points):
+    """Sum runs of ``factor`` buckets so at most ``max_points`` rows remain."""
+    factor = max(math.ceil(len(counts) / max_points), 1)
+    if factor == 1:
+        return counts, 1
+    padding = (-len(counts)) % factor
+    if padding:
+        counts = np.vstack([counts, np.zeros((padding, counts.shape[1]), dtype=counts.dtype)])
+    return counts.reshape(-1, factor, counts.shape[1]).sum(axis=1), factor
+
+
+def time_series(author, start, end, bucket='day', blog_id=None, max_points=DEFAULT_MAX_POINTS):
+    """
+    Interactions on ``author``'s blogs (or the single ``blog_id``) between
+    ``start`` and ``end``, as ``{timestamps, series: {type: [...]}, totals}``.
+    """
+    start, end, buckets = align_range(start, end, bucket)
+    if buckets > MAX_BUCKETS:
+        raise ValueError(f'Range too long for {bucket} buckets')
+
+    def compute():
+        queryset = BlogInteraction.objects.filter(blog__author=author, created__gte=start, created__lt=end)
+        if blog_id is not None:
+            queryset = queryset.filter(blog_id=blog_id)
+        counts, factor = downsample(bucket_counts(queryset, start, buckets, bucket), max_points)
+        step = BUCKETS[bucket][1] * factor
+        return {
+            'bucket': bucket,
+            'step_seconds': int(step.total_seconds()),
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'timestamps': [(start + step * i).isoformat() for i in range(len(counts))],
+            'series': {
+                interaction_type: counts[:, i].tolist()
+                for i, interaction_type in enumerate(INTERACTION_TYPES)
+            },
+            'totals': dict(zip(INTERACTION_TYPES, counts.sum(axis=0).tolist())),
+        }
+
+    key = f'series:{author.pk}:{blog_id or "all"}:{bucket}:{start.isoformat()}:{end.isoformat()}:{max_points}'
+    return get_or_compute('analytics', key, compute, timeout=CACHE_TIMEOUT)
@@ -0,0 +1,189 @@
+"""
+In-process title autocomplete.
+
+Every blog contributes a few search terms (its whole title, each title word
+and each tag, lowercased) to one sorted list, so the blogs matching a prefix
+are a contiguous slice found with two bisections; the slice is ranked by
+popularity and the best ``limit`` returned. Short prefixes match large
+slices, so their top results are memoised until the next change.
+
+The index is built lazily on the first search and kept current by the
+``Blogs`` save/delete receivers in ``basicApp.signals``. Other processes'
+writes and view/like counts drift in, so it is rebuilt when older than
+``MAX_AGE`` seconds, or at once when bulk writes that send no signals (such
+as ``import_blogs``) bump the ``autocomplete`` cache version. One thread
+rebuilds while the others keep searching the old index; updates arriving
+during a rebuild are replayed onto the new one, since its read may predate
+them.
+"""
+import bisect
+import re
+import sys
+import threading
+import time
+
+from .cache import get_version
+from .models import Blogs
+
+NAMESPACE = 'autocomplete'
+MAX_AGE = 600
+MAX_LIMIT = 20
+# Prefixes up to this length have their top results memoised.
+MEMO_PREFIX_LENGTH = 3
+_WORD_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    return ' '.join(_WORD_RE.findall(text.casefold()))
+
+
+def terms_of(title, tags):
+    """The distinct search terms of a blog: its title, the title's words and its tags."""
+    title = normalize(title)
+    terms = {title, *title.split()}
+    terms.update(normalize(tag) for tag in re.split(r'[,#]', tags or ''))
+    terms.discard('')
+    return sorted(terms)
+
+
+def popularity(views, likes_count):
+    return views + 5 * likes_count
+
+
+class AutocompleteIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._pending = None   # updates received while a build reads the database
+        self._terms = []       # sorted (term, blog_id)
+        self._blogs = {}       # blog_id -> (title, score, terms)
+        self._memo = {}
+        self._memory = None
+        self.built_at = None
+        self.version = None
+
+    # ---- Building and updating ----
+
+    def _stale(self):
+        return (
+            self.built_at is None or time.monotonic() - self.built_at > MAX_AGE
+            or self.version != get_version(NAMESPACE)
+        )
+
+    def build(self):
+        with self._build_lock:
+            self._build()
+
+    def _build(self):
+        version = get_version(NAMESPACE)
+        with self._lock:
+            self._pending = []
+        terms, blogs = [], {}
+        try:
+            rows = Blogs.objects.values_list('id', 'title', 'tags', 'views', 'likes_count').iterator(chunk_size=2000)
+            for blog_id, title, tags, views, likes_count in rows:
+                blog_terms = terms_of(title, tags)
+                blogs[blog_id] = (title, popularity(views, likes_count), blog_terms)
+                terms.extend((term, blog_id) for term in blog_terms)
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+        terms.sort()
+        with self._lock:
+            self._terms, self._blogs = terms, blogs
+            for blog, blog_id in self._pending:
+                self._remove(blog_id)
+                if blog is not None:
+                    self._add(blog)
+            self._pending = None
+            self._changed()
+            self.built_at = time.monotonic()
+            self.version = version
+
+    def _changed(self):
+        self._memo.clear()
+        self._memory = None
+
+    def _remove(self, blog_id):
+        entry = self._blogs.pop(blog_id, None)
+        if entry is None:
+            return
+        for term in entry[2]:
+            i = bisect.bisect_left(self._terms, (term, blog_id))
+            if i < len(self._terms) and self._terms[i] == (term, blog_id):
+                del self._terms[i]
+
+    def _add(self, blog):
+        blog_terms = terms_of(blog.title, blog.tags)
+        self._blogs[blog.pk] = (blog.title, popularity(blog.views, blog.likes_count), blog_terms)
+        for term in blog_terms:
+            bisect.insort(self._terms, (term, blog.pk))
+
+    def update(self, blog):
+        """Add ``blog`` or replace its entry; a no-op until the index is built."""
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((blog, blog.pk))
+            if self.built_at is None:
+                return
+            self._remove(blog.pk)
+            self._add(blog)
+            self._changed()
+
+    def remove(self, blog_id):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((None, blog_id))
+            if self.built_at is None:
+                return
+            self._remove(blog_id)
+            self._changed()
+
+    # ---- Searching ----
+
+    def search(self, query, limit=8):
+        """The ``limit`` most popular ``(blog_id, title)`` whose terms start with ``query``."""
+        # Only the first build is waited for; later ones run in one thread
+        # while the rest keep using the current index.
+        if self._stale() and self._build_lock.acquire(blocking=self.built_at is None):
+            try:
+                if self._stale():
+                    self._build()
+            finally:
+                self._build_lock.release()
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        memoised = len(prefix) <= MEMO_PREFIX_LENGTH
+        with self._lock:
+            if memoised and prefix in self._memo:
+                return self._memo[prefix][:limit]
+            start = bisect.bisect_left(self._terms, (prefix,))
+            # '\U0010ffff' sorts after every character a term can continue with.
+            end = bisect.bisect_left(self._terms, (prefix + '\U0010ffff',), start)
+            blog_ids = {blog_id for _, blog_id in self._terms[start:end]}
+            ranked = sorted(blog_ids, key=lambda blog_id: -self._blogs[blog_id][1])
+            results = [(blog_id, self._blogs[blog_id][0]) for blog_id in ranked[:MAX_LIMIT]]
+            if memoised:
+                self._memo[prefix] = results
+        return results[:limit]
+
+    def stats(self):
+        with self._lock:
+            if self._memory is None:
+                self._memory = (
+                    sys.getsizeof(self._terms) + sys.getsizeof(self._blogs)
+                    + sum(sys.getsizeof(entry) + sys.getsizeof(entry[0]) for entry in self._terms)
+                    + sum(sys.getsizeof(title) + sys.getsizeof(terms) for title, _, terms in self._blogs.values())
+                )
+            return {
+                'blogs': len(self._blogs),
+                'terms': len(self._terms),
+                'memoised_prefixes': len(self._memo),
+                'memory_bytes': self._memory,
+                'age_seconds': round(time.monotonic() - self.built_at, 1) if self.built_at is not None else None,
+            }
+
+
+index = AutocompleteIndex()
@@ -0,0 +1,177 @@
+"""
+Reproducible datasets and timing helpers for ``manage.py benchmark_views``.
+
+Everything generated here is derived from a seeded ``random.Random`` so two
+runs with the same scale and seed produce the same rows (including primary
+keys), which keeps results comparable across commits.
+"""
+import gzip
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Count
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import CustomUser
+from .counters import recount_counters
+from .models import Blogs, BlogComment, BlogInteraction, BlogReaction
+
+SCALES = {
+    'tiny': {'users': 20, 'blogs': 200, 'interactions': 2_000, 'comments': 500, 'reactions': 500},
+    'small': {'users': 200, 'blogs': 1_000, 'interactions': 20_000, 'comments': 5_000, 'reactions': 5_000},
+    'medium': {'users': 1_000, 'blogs': 10_000, 'interactions': 200_000, 'comments': 20_000, 'reactions': 50_000},
+    'large': {'users': 5_000, 'blogs': 100_000, 'interactions': 1_000_000, 'comments': 100_000, 'reactions': 200_000},
+}
+
+BATCH_SIZE = 5_000
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+INTERACTION_TYPES = ['view'] * 14 + ['like'] * 3 + ['dislike'] + ['comment'] * 2
+
+
+def _uuid(rng):
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _popular_index(rng, n):
+    # Heavily skewed towards the first rows, like real traffic on a few hot posts.
+    return min(int(n * rng.random() ** 3), n - 1)
+
+
+def _bulk(model, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+
+
+def seed(scale, seed=0, stdout=None):
+    """Populate the current database with the dataset for ``scale``."""
+    sizes = SCALES[scale]
+    rng = random.Random(seed)
+    categories = [choice[0] for choice in Blogs.CATEGORY]
+
+    def log(message):
+        if stdout:
+            stdout.write(message)
+
+    started = time.perf_counter()
+    _bulk(CustomUser, (
+        CustomUser(username=f'bench{i}', email=f'bench{i}@example.com', password='!')
+        for i in range(sizes['users'])
+    ))
+    user_ids = list(CustomUser.objects.filter(username__startswith='bench').order_by('id').values_list('id', flat=True))
+    log(f'  users: {len(user_ids)}')
+
+    blog_ids = [_uuid(rng) for _ in range(sizes['blogs'])]
+    _bulk(Blogs, (
+        Blogs(
+            id=blog_id,
+            title=f'Benchmark post {i}',
+            category=categories[i % len(categories)],
+            content='Lorem ipsum dolor sit amet. ' * rng.randint(20, 200),
+            tags='bench,perf',
+            created=EPOCH + timedelta(minutes=i),
+            author_id=user_ids[_popular_index(rng, len(user_ids))],
+            views=int(100_000 * rng.random() ** 4),
+        )
+        for i, blog_id in enumerate(blog_ids)
+    ))
+    log(f'  blogs: {len(blog_ids)}')
+
+    pairs = set()
+    while len(pairs) < sizes['reactions']:
+        pairs.add((rng.randrange(len(user_ids)), _popular_index(rng, len(blog_ids))))
+    _bulk(BlogReaction, (
+        BlogReaction(user_id=user_ids[u], blog_id=blog_ids[b], reaction=rng.choice(['like', 'like', 'dislike']))
+        for u, b in sorted(pairs)
+    ))
+    log(f'  reactions: {len(pairs)}')
+
+    _bulk(BlogComment, (
+        BlogComment(
+            user_id=user_ids[rng.randrange(len(user_ids))],
+            blog_id=blog_ids[_popular_index(rng, len(blog_ids))],
+            text='Benchmark comment',
+        )
+        for _ in range(sizes['comments'])
+    ))
+    log(f'  comments: {sizes["comments"]}')
+
+    def interactions():
+        for i in range(sizes['interactions']):
+            guest = rng.random() < 0.5
+            yield BlogInteraction(
+                user_id=None if guest else user_ids[rng.randrange(len(user_ids))],
+                session_key=f'benchsession{rng.randrange(sizes["users"] * 4):020d}' if guest else None,
+                blog_id=blog_ids[_popular_index(rng, len(blog_ids))],
+                interaction_type=rng.choice(INTERACTION_TYPES),
+            )
+    _bulk(BlogInteraction, interactions())
+    log(f'  interactions: {sizes["interactions"]}')
+
+    recount_counters()
+    log(f'  seeded in {time.perf_counter() - started:.1f}s')
+    return blog_ids, user_ids
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lower = int(k)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (k - lower)
+
+
+def measure(name, request, iterations, warmup=3):
+    """
+    Call ``request()`` (which must return a response) ``iterations`` times and
+    summarise latency, query count and payload size.
+    """
+    for _ in range(warmup):
+        request()
+
+    latencies, queries, sizes, identity_sizes, statuses = [], [], [], [], set()
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = request()
+            content = b''.join(response.streaming_content) if response.streaming else response.content
+            latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(len(ctx.captured_queries))
+        sizes.append(len(content))
+        if response.get('Content-Encoding') == 'gzip':
+            content = gzip.decompress(content)
+        identity_sizes.append(len(content))
+        statuses.add(response.status_code)
+
+    latencies.sort()
+    return {
+        'name': name,
+        'iterations': iterations,
+        'status': sorted(statuses),
+        'latency_ms': {
+            'min': round(latencies[0], 3),
+            'mean': round(statistics.fmean(latencies), 3),
+            'p50': round(percentile(latencies, 50), 3),
+            'p90': round(percentile(latencies, 90), 3),
+            'p95': round(percentile(latencies, 95), 3),
+            'p99': round(percentile(latencies, 99), 3),
+            'max': round(latencies[-1], 3),
+        },
+        'queries': {'min': min(queries), 'max': max(queries), 'mean': round(statistics.fmean(queries), 2)},
+        # ``mean`` is what went over the wire, ``identity_mean`` the decoded body.
+        'bytes': {'mean': round(statistics.fmean(sizes)), 'identity_mean': round(statistics.fmean(identity_sizes))},
+    }
+
+
+def busiest_author():
+    return CustomUser.objects.annotate(n=Count('blogs')).order_by('-n', 'id').first()
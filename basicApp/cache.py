@@ -0,0 +1,204 @@
+"""
+Small caching layer on top of Django's cache framework.
+
+Values are grouped into namespaces (``trending``, ``analytics`` ...). Each
+namespace maps to one of the aliases in ``settings.CACHES`` through
+``settings.CACHE_NAMESPACES`` and carries a version number, so a whole
+namespace can be invalidated at once with ``bump_version``.
+
+``get_or_compute`` protects hot keys from stampedes:
+
+* only one caller per key computes a missing value (in-process lock plus a
+  cache-level lock for other processes), the rest wait for the result;
+* entries have a soft TTL shorter than the hard TTL. Once the soft TTL has
+  passed, a single caller refreshes the value while everybody else keeps
+  getting the stale copy;
+* callers may refresh a little before the soft TTL (probabilistic early
+  refresh weighted by how long the value took to compute), which spreads
+  recomputation of popular keys over time.
+"""
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+
+DEFAULT_TIMEOUT = 300
+SOFT_TIMEOUT_RATIO = 0.8
+EARLY_REFRESH_BETA = 1.0
+LOCK_TIMEOUT = 30
+LOCK_POLL_INTERVAL = 0.05
+
+
+class NamespaceStats:
+    """Hit/miss/latency counters for one namespace."""
+
+    def __init__(self):
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.computes = 0
+        self.errors = 0
+        self.lookup_time = 0.0
+        self.compute_time = 0.0
+
+    def as_dict(self):
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'computes': self.computes,
+            'errors': self.errors,
+            'hit_ratio': (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            'avg_lookup_ms': self.lookup_time * 1000 / lookups if lookups else 0.0,
+            'avg_compute_ms': self.compute_time * 1000 / self.computes if self.computes else 0.0,
+        }
+
+
+_stats = defaultdict(NamespaceStats)
+_stats_lock = threading.Lock()
+# Striped locks keep memory bounded no matter how many keys are used.
+_key_locks = [threading.RLock() for _ in range(64)]
+
+
+def _record(namespace, **increments):
+    with _stats_lock:
+        stats = _stats[namespace]
+        for name, value in increments.items():
+            setattr(stats, name, getattr(stats, name) + value)
+
+
+def get_stats():
+    """Return a snapshot of the counters of every namespace seen so far."""
+    with _stats_lock:
+        return {namespace: stats.as_dict() for namespace, stats in _stats.items()}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def get_cache(namespace):
+    """Return the cache backend configured for ``namespace``."""
+    aliases = getattr(settings, 'CACHE_NAMESPACES', {})
+    return caches[aliases.get(namespace, 'default')]
+
+
+def _version_key(namespace):
+    return f'ns:{namespace}:version'
+
+
+def get_version(namespace):
+    cache = get_cache(namespace)
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        # Seed with a timestamp rather than 1 so that an evicted version key
+        # can never bring back entries written under an older version.
+        cache.add(_version_key(namespace), int(time.time() * 1000), timeout=None)
+        version = cache.get(_version_key(namespace))
+    return version
+
+
+def bump_version(namespace):
+    """Invalidate every key of ``namespace``."""
+    cache = get_cache(namespace)
+    try:
+        return cache.incr(_version_key(namespace))
+    except ValueError:
+        get_version(namespace)
+        return cache.incr(_version_key(namespace))
+
+
+def make_key(namespace, key):
+    return f'{namespace}:v{get_version(namespace)}:{key}'
+
+
+def delete(namespace, key):
+    get_cache(namespace).delete(make_key(namespace, key))
+
+
+def _local_lock(full_key):
+    return _key_locks[hash(full_key) % len(_key_locks)]
+
+
+def _should_refresh(soft_expires, compute_time, now):
+    # XFetch: the closer we get to the soft expiry, and the slower the value
+    # is to compute, the more likely a caller volunteers to refresh early.
+    return now - compute_time * EARLY_REFRESH_BETA * math.log(random.random() or 1e-12) >= soft_expires
+
+
+def _compute_and_store(cache, namespace, full_key, compute, timeout, soft_timeout):
+    started = time.perf_counter()
+    try:
+        value = compute()
+    except Exception:
+        _record(namespace, errors=1)
+        raise
+    compute_time = time.perf_counter() - started
+    _record(namespace, computes=1, compute_time=compute_time)
+    cache.set(full_key, (value, time.time() + soft_timeout, compute_time), timeout)
+    return value
+
+
+def get_or_compute(namespace, key, compute, timeout=DEFAULT_TIMEOUT, soft_timeout=None):
+    """
+    Return the cached value for ``key`` or call ``compute()`` to produce it.
+
+    ``timeout`` is the hard TTL after which the entry disappears from the
+    cache, ``soft_timeout`` (defaults to 80% of ``timeout``) the age after
+    which it is refreshed by a single caller while others keep using it.
+    """
+    if soft_timeout is None:
+        soft_timeout = timeout * SOFT_TIMEOUT_RATIO if timeout else DEFAULT_TIMEOUT
+    cache = get_cache(namespace)
+    full_key = make_key(namespace, key)
+    lock_key = f'{full_key}:lock'
+
+    started = time.perf_counter()
+    entry = cache.get(full_key)
+    if entry is not None:
+        value, soft_expires, compute_time = entry
+        if not _should_refresh(soft_expires, compute_time, time.time()):
+            _record(namespace, hits=1, lookup_time=time.perf_counter() - started)
+            return value
+
+        # Stale: let exactly one caller refresh, everybody else gets the old value.
+        lock = _local_lock(full_key)
+        if lock.acquire(blocking=False):
+            try:
+                if cache.add(lock_key, 1, LOCK_TIMEOUT):
+                    try:
+                        _record(namespace, stale_hits=1, lookup_time=time.perf_counter() - started)
+                        return _compute_and_store(cache, namespace, full_key, compute, timeout, soft_timeout)
+                    finally:
+                        cache.delete(lock_key)
+            finally:
+                lock.release()
+        _record(namespace, stale_hits=1, lookup_time=time.perf_counter() - started)
+        return value
+
+    _record(namespace, misses=1, lookup_time=time.perf_counter() - started)
+    with _local_lock(full_key):
+        # Another thread may have filled the key while we were waiting.
+        entry = cache.get(full_key)
+        if entry is not None:
+            return entry[0]
+
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while not cache.add(lock_key, 1, LOCK_TIMEOUT):
+            # Another process is computing; wait for its result.
+            time.sleep(LOCK_POLL_INTERVAL)
+            entry = cache.get(full_key)
+            if entry is not None:
+                return entry[0]
+            if time.monotonic() > deadline:
+                return _compute_and_store(cache, namespace, full_key, compute, timeout, soft_timeout)
+        try:
+            return _compute_and_store(cache, namespace, full_key, compute, timeout, soft_timeout)
+        finally:
+            cache.delete(lock_key)
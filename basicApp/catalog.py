@@ -0,0 +1,195 @@
+"""
+Sitemaps and RSS/Atom feeds of the blog catalog, for crawlers and readers.
+
+``/sitemap.xml`` is a sitemap index pointing at ``/sitemap-<n>.xml`` parts
+of ``SITEMAP_CHUNK_SIZE`` posts each, in ``(created, id)`` order. The index
+records the key each part starts at, so a part is a keyset range read with
+``iterator()`` and streamed out as it is read, whatever the catalog size.
+``/feeds/<category>/rss/`` and ``/feeds/<category>/atom/`` carry the latest
+``FEED_SIZE`` posts of a category (or ``all``).
+
+Everything is cached in the ``catalog`` namespace under a fingerprint made
+of its version, bumped when a post is created, edited or deleted (see
+``basicApp.signals``), and the latest ``updated``, one lookup on its index.
+The fingerprint is also the ETag of the index and every part, so crawlers
+revalidating an unchanged catalog get 304 after that lookup alone. Edits
+and new posts show up in every process through ``updated``; deletions only
+through the version, so give the namespace a shared cache when running
+several processes.
+"""
+import uuid
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.db.models import Q
+from django.http import Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.http.request import split_domain_port
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+
+from .cache import get_or_compute, get_version
+from .models import Blogs
+
+NAMESPACE = 'catalog'
+SITEMAP_CHUNK_SIZE = 10_000
+FEED_SIZE = 50
+CACHE_TIMEOUT = 60 * 60
+CATEGORIES = {value.lower(): value for value, _ in Blogs.CATEGORY}
+_PLACEHOLDER = uuid.UUID(int=0)
+_XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+_SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def blog_url_template(request):
+    """Absolute URL of a post with ``{}`` for its id; ``reverse`` once instead of per row."""
+    return request.build_absolute_uri(reverse('blog', args=[_PLACEHOLDER])).replace(str(_PLACEHOLDER), '{}')
+
+
+def fingerprint():
+    """Changes whenever a post is created, edited or deleted; ``updated`` is indexed."""
+    last = Blogs.objects.order_by('-updated').values_list('updated', flat=True).first()
+    return f'{get_version(NAMESPACE)}-{last.timestamp() if last else 0:.6f}'
+
+
+def cache_host(request):
+    """
+    The request's host if it is named outright in ``ALLOWED_HOSTS`` (on the
+    server's own port), else ``None``: wildcard entries would let arbitrary
+    Host headers each get a cache entry.
+    """
+    host = request.get_host()
+    domain, port = split_domain_port(host)
+    allowed = settings.ALLOWED_HOSTS or (['localhost', '127.0.0.1', '[::1]'] if settings.DEBUG else [])
+    if domain in allowed and port in ('', request.META.get('SERVER_PORT')):
+        return host
+    return None
+
+
+def chunk_starts(state):
+    """The ``(created, id)`` key each sitemap part starts at, from one streamed pass over the keys."""
+    chunk_size = SITEMAP_CHUNK_SIZE
+
+    def compute():
+        keys = Blogs.objects.order_by('created', 'id').values_list('created', 'id').iterator(chunk_size=5000)
+        return [key for i, key in enumerate(keys) if i % chunk_size == 0]
+    return get_or_compute(NAMESPACE, f'chunks:{state}:{chunk_size}', compute, timeout=CACHE_TIMEOUT)
+
+
+def sitemap_index(request):
+    state = fingerprint()
+    etag = f'"{state}-index"'
+    if request.headers.get('If-None-Match') == etag:
+        return HttpResponseNotModified(headers={'ETag': etag})
+    parts = ''.join(
+        f'<sitemap><loc>{escape(request.build_absolute_uri(reverse("sitemap_part", args=[n])))}</loc></sitemap>\n'
+        for n in range(1, len(chunk_starts(state)) + 1)
+    )
+    response = HttpResponse(
+        f'{_XML_HEADER}<sitemapindex xmlns="{_SITEMAP_NS}">\n{parts}</sitemapindex>\n',
+        content_type='application/xml',
+    )
+    response['ETag'] = etag
+    return response
+
+
+def _sitemap_urls(request, start, end):
+    template = blog_url_template(request)
+    rows = Blogs.objects.filter(Q(created__gt=start[0]) | Q(created=start[0], id__gte=start[1]))
+    if end is not None:
+        rows = rows.filter(Q(created__lt=end[0]) | Q(created=end[0], id__lt=end[1]))
+    rows = rows.order_by('created', 'id').values_list('id', 'updated').iterator(chunk_size=2000)
+
+    yield f'{_XML_HEADER}<urlset xmlns="{_SITEMAP_NS}">\n'
+    for blog_id, updated in rows:
+        loc = escape(template.format(blog_id))
+        yield f'<url><loc>{loc}</loc><lastmod>{updated.date().isoformat()}</lastmod></url>\n'
+    yield '</urlset>\n'
+
+
+def sitemap_part(request, part):
+    state = fingerprint()
+    starts = chunk_starts(state)
+    if not 1 <= part <= len(starts):
+        raise Http404('No such sitemap')
+    etag = f'"{state}-{part}"'
+    if request.headers.get('If-None-Match') == etag:
+        return HttpResponseNotModified(headers={'ETag': etag})
+    end = starts[part] if part < len(starts) else None
+    response = StreamingHttpResponse(_sitemap_urls(request, starts[part - 1], end), content_type='application/xml')
+    response['ETag'] = etag
+    return response
+
+
+class CategoryFeed(Feed):
+    """Latest posts of a category, or of every category for ``all``."""
+
+    def get_object(self, request, category):
+        if category != 'all' and category not in CATEGORIES:
+            raise Http404('No such category')
+        return CATEGORIES.get(category)
+
+    def title(self, category):
+        return f'BlogHub - {category or "All"} posts'
+
+    def link(self, category):
+        return reverse('blogs')
+
+    def description(self, category):
+        return f'The latest {category + " " if category else ""}stories from the BlogHub community.'
+
+    def items(self, category):
+        blogs = Blogs.objects.select_related('author').order_by('-created')
+        if category:
+            blogs = blogs.filter(category=category)
+        return blogs[:FEED_SIZE]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return Truncator(item.content).words(60)
+
+    def item_link(self, item):
+        return reverse('blog', args=[item.id])
+
+    def item_pubdate(self, item):
+        return item.created
+
+    def item_updateddate(self, item):
+        return item.updated
+
+    def item_author_name(self, item):
+        return item.author.username if item.author else None
+
+    def item_categories(self, item):
+        return [item.category]
+
+
+class AtomCategoryFeed(CategoryFeed):
+    feed_type = Atom1Feed
+    subtitle = CategoryFeed.description
+
+
+_FEEDS = {'rss': CategoryFeed(), 'atom': AtomCategoryFeed()}
+
+
+def category_feed(request, category, kind):
+    """The RSS or Atom feed of ``category``, rendered once per catalog state and host."""
+    if kind not in _FEEDS or (category != 'all' and category not in CATEGORIES):
+        raise Http404('No such feed')
+    feed = _FEEDS[kind]
+
+    def render():
+        response = feed(request, category=category)
+        return response.content, response['Content-Type']
+
+    host = cache_host(request)
+    if host is None:
+        content, content_type = render()
+    else:
+        content, content_type = get_or_compute(
+            NAMESPACE, f'feed:{fingerprint()}:{host}:{category}:{kind}', render, timeout=CACHE_TIMEOUT,
+        )
+    return HttpResponse(content, content_type=content_type)
@@ -0,0 +1,193 @@
+"""
+View, like and dislike counters of blogs, optionally sharded.
+
+By default every write is an ``UPDATE`` of the blog's own row, so concurrent
+writers to a trending post wait on each other's row lock. With
+``SHARDED_COUNTERS['ENABLED']`` the delta goes to one of ``SHARDS``
+``BlogCounterShard`` rows picked at random instead, and ``fold`` (run by
+``manage.py fold_counters``) periodically adds the shards into the ``Blogs``
+columns. Between folds the columns lag behind; pages that need exact values
+read them through ``annotate_fresh`` / ``fresh_counts``, which add the
+pending shard sums in the same query.
+"""
+import random
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .cache import get_cache, make_key
+from .models import Blogs, BlogComment, BlogCounterShard, BlogReaction
+
+FIELDS = ('views', 'likes_count', 'dislikes_count')
+REACTION_FIELDS = {BlogReaction.LIKE: 'likes_count', BlogReaction.DISLIKE: 'dislikes_count'}
+DEFAULT_SETTINGS = {'ENABLED': False, 'SHARDS': 8}
+FOLD_CHUNK_SIZE = 500
+# Counters cached by ``cached_counts``. Reaction and comment writes drop
+# their blog's entry; views may lag by up to COUNTS_TIMEOUT seconds.
+COUNTS_NAMESPACE = 'counts'
+COUNTS_TIMEOUT = 10
+
+
+def get_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, 'SHARDED_COUNTERS', {})}
+
+
+def enabled():
+    return get_settings()['ENABLED']
+
+
+def increment(blog_id, **deltas):
+    """Add ``deltas`` (e.g. ``views=1``) to a blog's counters; ``False`` if it does not exist."""
+    updates = {field: F(field) + n for field, n in deltas.items() if n}
+    if not enabled():
+        return bool(Blogs.objects.filter(id=blog_id).update(**updates))
+
+    shard = random.randrange(get_settings()['SHARDS'])
+    shards = BlogCounterShard.objects.filter(blog_id=blog_id, shard=shard)
+    if shards.update(**updates):
+        return True
+    # First write to this shard: create it, then retry the same update so a
+    # concurrent creator is not overwritten.
+    if not Blogs.objects.filter(id=blog_id).exists():
+        return False
+    BlogCounterShard.objects.bulk_create([BlogCounterShard(blog_id=blog_id, shard=shard)], ignore_conflicts=True)
+    return bool(shards.update(**updates))
+
+
+def reaction_changed(blog, added=None, removed=None):
+    """Count a reaction ``added`` and/or ``removed`` on ``blog`` and refresh its counters."""
+    deltas = {}
+    if added in REACTION_FIELDS:
+        deltas[REACTION_FIELDS[added]] = 1
+    if removed in REACTION_FIELDS:
+        deltas[REACTION_FIELDS[removed]] = deltas.get(REACTION_FIELDS[removed], 0) - 1
+    increment(blog.pk, **deltas)
+    refresh_counts(blog)
+
+
+def _pending(field):
+    return Coalesce(Subquery(
+        BlogCounterShard.objects.filter(blog=OuterRef('pk'))
+        .order_by().values('blog').annotate(n=Sum(field)).values('n')[:1],
+        output_field=IntegerField(),
+    ), Value(0))
+
+
+def annotate_fresh(queryset):
+    """Add ``fresh_views``, ``fresh_likes_count`` and ``fresh_dislikes_count``: the columns plus pending shards."""
+    if not enabled():
+        return queryset.annotate(**{f'fresh_{field}': F(field) for field in FIELDS})
+    return queryset.annotate(**{f'fresh_{field}': F(field) + _pending(field) for field in FIELDS})
+
+
+def apply_fresh(blog):
+    """Copy the ``annotate_fresh`` values onto the counter fields of ``blog``."""
+    for field in FIELDS:
+        setattr(blog, field, getattr(blog, f'fresh_{field}'))
+    return blog
+
+
+def fresh_counts(blog_id):
+    """Exact counters of one blog (with ``comments_count``), ``None`` if it does not exist."""
+    row = annotate_fresh(Blogs.objects.filter(id=blog_id)).values_list(
+        *(f'fresh_{field}' for field in FIELDS), 'comments_count',
+    ).first()
+    return dict(zip((*FIELDS, 'comments_count'), row)) if row else None
+
+
+def cached_counts(blog_ids):
+    """
+    ``{id: {views, likes_count, dislikes_count, comments_count}}`` for the
+    existing blogs among ``blog_ids``, from the cache where possible and one
+    ``id__in`` query for the rest.
+    """
+    cache = get_cache(COUNTS_NAMESPACE)
+    prefix = make_key(COUNTS_NAMESPACE, '')
+    keys = {prefix + str(blog_id): str(blog_id) for blog_id in blog_ids}
+    counts = {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+
+    missing = [blog_id for blog_id in keys.values() if blog_id not in counts]
+    if missing:
+        rows = annotate_fresh(Blogs.objects.filter(id__in=missing)).values(
+            'id', *(f'fresh_{field}' for field in FIELDS), 'comments_count',
+        )
+        fetched = {
+            str(row['id']): {
+                **{field: row[f'fresh_{field}'] for field in FIELDS},
+                'comments_count': row['comments_count'],
+            }
+            for row in rows
+        }
+        cache.set_many({prefix + blog_id: value for blog_id, value in fetched.items()}, COUNTS_TIMEOUT)
+        counts.update(fetched)
+    return counts
+
+
+def forget_counts(blog_id):
+    """Drop the cached counters of ``blog_id`` once the current transaction commits."""
+    key = make_key(COUNTS_NAMESPACE, str(blog_id))
+    transaction.on_commit(lambda: get_cache(COUNTS_NAMESPACE).delete(key))
+
+
+def refresh_counts(blog):
+    counts = fresh_counts(blog.pk) or {}
+    for field, value in counts.items():
+        setattr(blog, field, value)
+    return blog
+
+
+def fold(blog_ids=None, chunk_size=FOLD_CHUNK_SIZE):
+    """
+    Move the shard deltas into the ``Blogs`` columns, ``chunk_size`` blogs per
+    transaction. The folded shard rows are locked, then deleted, so a write
+    racing the fold lands in a new shard row and is folded next time.
+    Returns ``(blogs, shard_rows)`` folded.
+    """
+    pending = BlogCounterShard.objects.order_by()
+    if blog_ids is not None:
+        pending = pending.filter(blog_id__in=list(blog_ids))
+    pending_ids = list(pending.values_list('blog_id', flat=True).distinct())
+
+    blogs = rows = 0
+    for start in range(0, len(pending_ids), chunk_size):
+        chunk = pending_ids[start:start + chunk_size]
+        with transaction.atomic():
+            shards = list(
+                BlogCounterShard.objects.select_for_update().filter(blog_id__in=chunk)
+                .values_list('pk', 'blog_id', *FIELDS)
+            )
+            totals = {}
+            for _, blog_id, *deltas in shards:
+                running = totals.setdefault(blog_id, [0] * len(FIELDS))
+                for i, delta in enumerate(deltas):
+                    running[i] += delta
+            for blog_id, deltas in totals.items():
+                updates = {field: F(field) + n for field, n in zip(FIELDS, deltas) if n}
+                if updates:
+                    Blogs.objects.filter(id=blog_id).update(**updates)
+            BlogCounterShard.objects.filter(pk__in=[shard[0] for shard in shards]).delete()
+        blogs += len(totals)
+        rows += len(shards)
+    return blogs, rows
+
+
+def recount_counters(queryset=None):
+    """Recompute the denormalised like/dislike/comment counters set-based."""
+    queryset = Blogs.objects.all() if queryset is None else queryset
+
+    def count_of(model, **filters):
+        return Coalesce(Subquery(
+            model.objects.filter(blog=OuterRef('pk'), **filters)
+            .order_by().values('blog').annotate(n=Count('pk')).values('n')[:1],
+            output_field=IntegerField(),
+        ), Value(0))
+
+    # The recount is exact, so pending reaction deltas would count twice.
+    BlogCounterShard.objects.filter(blog__in=queryset.values('pk')).update(likes_count=0, dislikes_count=0)
+    return queryset.update(
+        likes_count=count_of(BlogReaction, reaction='like'),
+        dislikes_count=count_of(BlogReaction, reaction='dislike'),
+        comments_count=count_of(BlogComment),
+    )
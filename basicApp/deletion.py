@@ -0,0 +1,104 @@
+"""
+Blog deletion without per-row work.
+
+``blog.delete()`` cascades through Django's collector, which loads every
+comment and reaction so it can send ``post_delete`` for each of them, and
+the counter receivers in ``basicApp.signals`` then recount and save the
+blog once per row. Deleting the dependents first, a chunk at a time and
+with those receivers switched off (``suppress_counter_signals``), turns
+that into two queries per chunk; the blogs themselves go last, when the
+cascade has nothing left to collect.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+
+from django.db import close_old_connections, transaction
+from django.db.models import F, Sum
+
+from .cache import bump_version
+from .storage import release
+from .models import Blogs, BlogComment, BlogCounterShard, BlogInteraction, BlogReaction, BlogViewSketch
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 2000
+# Posts with more dependent rows than this (estimated from their counters)
+# are deleted in a background thread.
+BACKGROUND_THRESHOLD = 20_000
+DEPENDENTS = [BlogInteraction, BlogViewSketch, BlogCounterShard, BlogReaction, BlogComment]
+
+_state = threading.local()
+
+
+@contextmanager
+def suppress_counter_signals():
+    """Make the counter receivers no-ops in this thread, e.g. while the blog itself goes away."""
+    previous = getattr(_state, 'suppressed', False)
+    _state.suppressed = True
+    try:
+        yield
+    finally:
+        _state.suppressed = previous
+
+
+def counter_signals_suppressed():
+    return getattr(_state, 'suppressed', False)
+
+
+def estimated_dependents(blog_ids):
+    return Blogs.objects.filter(id__in=blog_ids).aggregate(
+        n=Sum(F('views') + F('likes_count') + F('dislikes_count') + F('comments_count')),
+    )['n'] or 0
+
+
+def delete_dependents(model, blog_ids, chunk_size=CHUNK_SIZE):
+    deleted = 0
+    while True:
+        chunk = list(model.objects.filter(blog_id__in=blog_ids).values_list('pk', flat=True)[:chunk_size])
+        if not chunk:
+            return deleted
+        with transaction.atomic():
+            deleted += model.objects.filter(pk__in=chunk).delete()[0]
+
+
+def delete_blogs_now(blog_ids, chunk_size=CHUNK_SIZE):
+    """Delete ``blog_ids`` and everything hanging off them; returns the rows deleted per model."""
+    blog_ids = list(blog_ids)
+    images = set(Blogs.objects.filter(id__in=blog_ids).values_list('featureImage', flat=True))
+    counts = {}
+    with suppress_counter_signals():
+        for model in DEPENDENTS:
+            counts[model._meta.label] = delete_dependents(model, blog_ids, chunk_size)
+        counts[Blogs._meta.label] = Blogs.objects.filter(id__in=blog_ids).delete()[1].get(Blogs._meta.label, 0)
+    bump_version('trending')
+    transaction.on_commit(lambda: release(images))
+    return counts
+
+
+def _delete_in_background(blog_ids):
+    try:
+        counts = delete_blogs_now(blog_ids)
+        logger.info('Deleted %s in the background', counts)
+    except Exception:
+        logger.exception('Background deletion of %d blogs failed', len(blog_ids))
+    finally:
+        close_old_connections()
+
+
+def delete_blogs(blog_ids, background=None):
+    """
+    Delete ``blog_ids`` with their dependents. Large posts (see
+    ``BACKGROUND_THRESHOLD``) go to a background thread unless ``background``
+    says otherwise. Returns ``True`` when the deletion was deferred.
+    """
+    blog_ids = list(blog_ids)
+    if background is None:
+        background = estimated_dependents(blog_ids) > BACKGROUND_THRESHOLD
+    if not background:
+        delete_blogs_now(blog_ids)
+        return False
+    transaction.on_commit(
+        lambda: threading.Thread(target=_delete_in_background, args=(blog_ids,), daemon=True).start()
+    )
+    return True
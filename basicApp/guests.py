@@ -0,0 +1,51 @@
+"""
+Identity of anonymous readers without database sessions.
+
+A guest is known by a random key in a signed cookie, handed out only once
+there is something to remember about them (a recorded view, a scroll
+position). Their interactions are stored under that key in
+``BlogInteraction.session_key``, and the scroll state is keyed on it in the
+cache, so browsing as a guest never writes to ``django_session``; members
+keep their regular sessions.
+"""
+import secrets
+
+from django.conf import settings
+from django.core import signing
+
+COOKIE_NAME = getattr(settings, 'GUEST_COOKIE_NAME', 'guest_id')
+COOKIE_MAX_AGE = getattr(settings, 'GUEST_COOKIE_AGE', 60 * 60 * 24 * 365)
+SALT = 'basicApp.guests'
+
+
+def sign(key):
+    """The cookie value carrying ``key``, as ``HttpResponse.set_signed_cookie`` writes it."""
+    return signing.get_cookie_signer(salt=COOKIE_NAME + SALT).sign(key)
+
+
+def guest_key(request):
+    """This guest's key, or ``None`` if they have not been given one (or the cookie is forged)."""
+    if not hasattr(request, '_guest_key'):
+        request._guest_key = request.get_signed_cookie(
+            COOKIE_NAME, default=None, salt=SALT, max_age=COOKIE_MAX_AGE,
+        )
+    return request._guest_key
+
+
+def ensure_guest_key(request):
+    """This guest's key, creating one (set as a cookie on the response) if needed."""
+    key = guest_key(request)
+    if key is None:
+        key = request._guest_key = secrets.token_urlsafe(24)
+        request._guest_key_created = True
+    return key
+
+
+def set_cookie(request, response):
+    """Send the key created during this request; called by ``GuestCookieMiddleware``."""
+    if getattr(request, '_guest_key_created', False):
+        response.set_signed_cookie(
+            COOKIE_NAME, request._guest_key, salt=SALT, max_age=COOKIE_MAX_AGE,
+            secure=settings.SESSION_COOKIE_SECURE, httponly=True, samesite='Lax',
+        )
+    return response
@@ -0,0 +1,126 @@
+"""
+Live like/dislike/comment counts over Server-Sent Events.
+
+The counter receivers in ``basicApp.signals`` already recompute a blog's
+counts on every reaction or comment write; once that transaction commits
+they hand the result to the process-wide ``broadcaster``, which copies it
+into the queue of every open stream subscribed to that blog. A count change
+is therefore computed once, however many readers are watching.
+
+Streams are held open by the event loop, so they need the ASGI entry point
+(``uvicorn ZapuzaDjangoBasicApp.asgi:application``). The broadcaster lives
+in memory: writes served by another process are not seen, so run a single
+worker, or replace ``Broadcaster`` with a pub/sub backed one. Under WSGI the
+endpoint answers 204, which makes EventSource give up rather than poll.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+MAX_BLOGS_PER_STREAM = 50
+# Counts are absolute, so a slow client only needs the latest ones.
+QUEUE_SIZE = 100
+KEEPALIVE_SECONDS = 15
+RETRY_MS = 5000
+
+
+def _offer(queue, event):
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+
+class Broadcaster:
+    """Fans count events out to the subscribers of each blog id, from any thread."""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe(self, blog_ids, loop=None):
+        """A queue receiving the events of ``blog_ids``; call from the loop that reads it."""
+        loop = loop or asyncio.get_running_loop()
+        queue = asyncio.Queue(QUEUE_SIZE)
+        subscriber = (loop, queue)
+        with self._lock:
+            for blog_id in blog_ids:
+                self._subscribers[str(blog_id)].add(subscriber)
+        return queue
+
+    def unsubscribe(self, blog_ids, queue):
+        with self._lock:
+            for blog_id in blog_ids:
+                subscribers = self._subscribers.get(str(blog_id))
+                if subscribers is None:
+                    continue
+                subscribers.difference_update({s for s in subscribers if s[1] is queue})
+                if not subscribers:
+                    del self._subscribers[str(blog_id)]
+
+    def publish(self, blog_id, counts):
+        event = {'id': str(blog_id), **counts}
+        with self._lock:
+            subscribers = list(self._subscribers.get(str(blog_id), ()))
+            self.published += 1
+            self.delivered += len(subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                # The stream's loop has shut down; its unsubscribe is pending.
+                pass
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'blogs': len(self._subscribers),
+                'subscriptions': sum(len(s) for s in self._subscribers.values()),
+                'published': self.published,
+                'delivered': self.delivered,
+            }
+
+
+broadcaster = Broadcaster()
+
+
+def blog_counts(blog):
+    return {'likes': blog.likes_count, 'dislikes': blog.dislikes_count, 'comments': blog.comments_count}
+
+
+def publish_counts(blog):
+    """Broadcast ``blog``'s counts once the current transaction commits."""
+    blog_id, counts = blog.pk, blog_counts(blog)
+    transaction.on_commit(lambda: broadcaster.publish(blog_id, counts))
+
+
+def format_event(data, event='counts'):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+async def event_stream(blog_ids, snapshot):
+    """
+    The SSE body: the current counts, then every published change, with a
+    comment line every ``KEEPALIVE_SECONDS`` so proxies keep the connection.
+    """
+    queue = broadcaster.subscribe(blog_ids)
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        for counts in snapshot:
+            yield format_event(counts)
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            yield format_event(event)
+    finally:
+        broadcaster.unsubscribe(blog_ids, queue)
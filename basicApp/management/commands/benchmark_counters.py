@@ -0,0 +1,107 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connection
+from django.test import override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from accounts.models import CustomUser
+from basicApp import benchmarks, counters
+from basicApp.models import Blogs
+
+
+class Command(BaseCommand):
+    help = (
+        'Hammer the view counter of one blog from concurrent writer threads, '
+        'once updating the Blogs row and once with sharded counters, in a '
+        'throwaway test database. Use the production database engine: SQLite '
+        'serialises all writers regardless of the row.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--increments', type=int, default=200, help='Increments per writer.')
+        parser.add_argument('--shards', type=int, default=counters.get_settings()['SHARDS'])
+        parser.add_argument('--retries', type=int, default=50, help='Retries of a write that hits a lock error.')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(QUERY_PROFILING={'ENABLED': False}):
+                author = CustomUser.objects.create(username='counter-benchmark')
+                blog = Blogs.objects.create(title='Hot', category='Other', content='', tags='', author=author)
+                results = [
+                    self.run_mode('row', blog, options, enabled=False),
+                    self.run_mode('sharded', blog, options, enabled=True),
+                ]
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write('')
+        self.stdout.write(
+            f'{"mode":<10}{"writes/s":>10}{"p50 ms":>10}{"p95 ms":>10}{"retries":>9}{"fold ms":>9}  total'
+        )
+        for r in results:
+            self.stdout.write(
+                f'{r["mode"]:<10}{r["throughput"]:>10.0f}{r["p50"]:>10.2f}{r["p95"]:>10.2f}'
+                f'{r["retries"]:>9}{r["fold_ms"]:>9.1f}  {r["total"]}/{r["expected"]}'
+            )
+
+    def run_mode(self, mode, blog, options, enabled):
+        self.stdout.write(f'Running {mode} ({options["writers"]} writers x {options["increments"]})...')
+        Blogs.objects.filter(id=blog.id).update(views=0)
+        latencies, retries, errors = [], [0], []
+        lock = threading.Lock()
+
+        def writer():
+            mine, retried = [], 0
+            try:
+                for _ in range(options['increments']):
+                    started = time.perf_counter()
+                    for attempt in range(options['retries'] + 1):
+                        try:
+                            counters.increment(blog.id, views=1)
+                            break
+                        except OperationalError:
+                            if attempt == options['retries']:
+                                raise
+                            retried += 1
+                            time.sleep(0.001 * (attempt + 1))
+                    mine.append((time.perf_counter() - started) * 1000)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                close_old_connections()
+                with lock:
+                    latencies.extend(mine)
+                    retries[0] += retried
+
+        with override_settings(SHARDED_COUNTERS={'ENABLED': enabled, 'SHARDS': options['shards']}):
+            threads = [threading.Thread(target=writer) for _ in range(options['writers'])]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+
+            fold_started = time.perf_counter()
+            counters.fold()
+            fold_ms = (time.perf_counter() - fold_started) * 1000
+
+        for error in errors[:3]:
+            self.stderr.write(f'  writer failed: {error}')
+        latencies.sort()
+        return {
+            'mode': mode,
+            'throughput': len(latencies) / elapsed if elapsed else 0.0,
+            'p50': benchmarks.percentile(latencies, 50),
+            'p95': benchmarks.percentile(latencies, 95),
+            'retries': retries[0],
+            'fold_ms': fold_ms,
+            'total': Blogs.objects.filter(id=blog.id).values_list('views', flat=True).get(),
+            'expected': options['writers'] * options['increments'],
+        }
@@ -0,0 +1,158 @@
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone as dt_timezone
+
+import django
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from basicApp import benchmarks
+from basicApp.models import Blogs
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def wire_ratio(result):
+    """Bytes sent over decoded bytes (older result files have no ``identity_mean``)."""
+    identity = result['bytes'].get('identity_mean') or result['bytes']['mean']
+    return result['bytes']['mean'] / identity if identity else 1.0
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database with a reproducible dataset and measure '
+        'latency and query count of the main views through the test client.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(benchmarks.SCALES), default='small')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--only', nargs='*', help='Run only the named benchmarks.')
+        parser.add_argument('--output', help='Write the JSON results to this file.')
+        parser.add_argument('--compare', help='Print the difference against a previous JSON result file.')
+        parser.add_argument('--keepdb', action='store_true', help='Reuse an already seeded test database.')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as fh:
+                    baseline = json.load(fh)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Cannot read {options["compare"]}: {e}')
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            with override_settings(QUERY_PROFILING={'ENABLED': False}):
+                report = self.run_benchmarks(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        self.print_report(report, baseline)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Results written to {options["output"]}'))
+
+    def run_benchmarks(self, options):
+        if not Blogs.objects.exists():
+            self.stdout.write(f'Seeding "{options["scale"]}" dataset (seed={options["seed"]})...')
+            benchmarks.seed(options['scale'], options['seed'], stdout=self.stdout)
+
+        for alias in settings.CACHES:
+            caches[alias].clear()
+
+        hot_blog = Blogs.objects.order_by('-views').first()
+        author = benchmarks.busiest_author()
+        reader = Blogs.objects.exclude(author=author).values_list('author', flat=True).first() or author.pk
+
+        guest = Client()
+        member = Client()
+        gzip_member = Client(HTTP_ACCEPT_ENCODING='gzip')
+        gzip_member.force_login(author.__class__.objects.get(pk=reader))
+        member.force_login(author.__class__.objects.get(pk=reader))
+        owner = Client()
+        owner.force_login(author)
+        page_count = max(Blogs.objects.count() // 9, 1)
+        blog_etag = member.get(f'/blog/{hot_blog.id}/')['ETag']
+
+        scenarios = {
+            'blogs_guest': lambda: guest.get('/blogs/'),
+            'blogs_member_deep_page': lambda: member.get('/blogs/', {'page': page_count // 2}),
+            'blog_guest': lambda: guest.get(f'/blog/{hot_blog.id}/'),
+            'blog_member': lambda: member.get(f'/blog/{hot_blog.id}/'),
+            'blog_member_not_modified': lambda: member.get(f'/blog/{hot_blog.id}/', HTTP_IF_NONE_MATCH=blog_etag),
+            'record_view_member': lambda: member.post(f'/blog/{hot_blog.id}/view/'),
+            'get_next_blogs_guest': lambda: guest.get('/api/get-next-blogs/', {'current_blog_id': hot_blog.id, 'offset': 0}),
+            'get_next_blogs_member': lambda: member.get('/api/get-next-blogs/', {'current_blog_id': hot_blog.id, 'offset': 5}),
+            # Same scroll API with Accept-Encoding: gzip, for the wire size.
+            'get_next_blogs_member_gzip': lambda: gzip_member.get('/api/get-next-blogs/', {'current_blog_id': hot_blog.id, 'offset': 5}),
+            'blog_member_gzip': lambda: gzip_member.get(f'/blog/{hot_blog.id}/'),
+            'scrollView_member': lambda: member.get('/scrollView/'),
+            'toggle_reaction': lambda: member.post(f'/blog/{hot_blog.id}/reaction/like/'),
+            'add_comment': lambda: member.post(f'/blog/{hot_blog.id}/add-comment/', {'comment_text': 'Benchmark'}),
+            'dashboard': lambda: owner.get('/accounts/dashboard/'),
+            'comments': lambda: owner.get('/accounts/comments/'),
+        }
+        if options['only']:
+            unknown = set(options['only']) - set(scenarios)
+            if unknown:
+                raise CommandError(f'Unknown benchmarks: {", ".join(sorted(unknown))}')
+            scenarios = {name: scenarios[name] for name in options['only']}
+
+        results = []
+        for name, request in scenarios.items():
+            self.stdout.write(f'Running {name}...')
+            results.append(benchmarks.measure(name, request, options['iterations'], options['warmup']))
+
+        return {
+            'meta': {
+                'revision': git_revision(),
+                'timestamp': datetime.now(dt_timezone.utc).isoformat(),
+                'scale': options['scale'],
+                'sizes': benchmarks.SCALES[options['scale']],
+                'seed': options['seed'],
+                'iterations': options['iterations'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+            },
+            'results': results,
+        }
+
+    def print_report(self, report, baseline=None):
+        previous = {r['name']: r for r in baseline['results']} if baseline else {}
+        self.stdout.write('')
+        self.stdout.write(f'{"benchmark":<28}{"p50 ms":>10}{"p95 ms":>10}{"queries":>9}{"bytes":>10}{"wire %":>8}')
+        for result in report['results']:
+            line = (
+                f'{result["name"]:<28}'
+                f'{result["latency_ms"]["p50"]:>10.2f}'
+                f'{result["latency_ms"]["p95"]:>10.2f}'
+                f'{result["queries"]["max"]:>9}'
+                f'{result["bytes"]["mean"]:>10}'
+                f'{wire_ratio(result):>8.1%}'
+            )
+            before = previous.get(result['name'])
+            if before:
+                p50 = before['latency_ms']['p50']
+                change = (result['latency_ms']['p50'] - p50) / p50 * 100 if p50 else 0.0
+                line += f'   p50 {change:+.1f}%  queries {result["queries"]["max"] - before["queries"]["max"]:+d}'
+            self.stdout.write(line)
@@ -0,0 +1,51 @@
+import os
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from basicApp.models import Blogs
+from basicApp.storage import is_content_addressed, release
+
+
+class Command(BaseCommand):
+    help = (
+        'Move feature images uploaded before content-addressed storage into it, '
+        'pointing every blog at the single stored copy and deleting the duplicates, '
+        'then delete stored images no blog references.'
+    )
+
+    def handle(self, *args, **options):
+        field = Blogs._meta.get_field('featureImage')
+        storage = field.storage
+        names = Blogs.objects.order_by().values_list('featureImage', flat=True).distinct()
+        moved = missing = 0
+        for name in list(names):
+            if not name or name == field.default or is_content_addressed(name):
+                continue
+            if not storage.exists(name):
+                missing += 1
+                continue
+            with storage.open(name) as content:
+                stored = storage.save(name, content)
+            Blogs.objects.filter(featureImage=name).update(featureImage=stored)
+            release([name])
+            moved += 1
+        swept = 0
+        stored = self.stored_names(field)
+        while batch := list(islice(stored, 500)):
+            swept += len(release(batch))
+        self.stdout.write(self.style.SUCCESS(
+            f'Moved {moved} images, {missing} missing on disk, deleted {swept} unreferenced'
+        ))
+
+    def stored_names(self, field):
+        """Every content-addressed file under the field's upload directory."""
+        storage = field.storage
+        # Up to the first strftime placeholder; a callable may upload anywhere.
+        upload_dir = '' if callable(field.upload_to) else field.upload_to.split('%', 1)[0]
+        root = storage.path('')
+        for directory, _, files in os.walk(storage.path(upload_dir)):
+            for filename in files:
+                name = os.path.relpath(os.path.join(directory, filename), root).replace(os.sep, '/')
+                if is_content_addressed(name):
+                    yield name
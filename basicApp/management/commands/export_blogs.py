@@ -0,0 +1,46 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_datetime
+
+from basicApp import transfer
+from basicApp.models import Blogs
+
+
+class Command(BaseCommand):
+    help = 'Stream blogs to a JSON Lines file (or stdout), oldest first.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='-', help='File to write, "-" for stdout.')
+        parser.add_argument('--category', choices=sorted(transfer.CATEGORIES))
+        parser.add_argument('--author', help='Only blogs of this username.')
+        parser.add_argument('--since', help='Only blogs created at or after this ISO datetime.')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        queryset = Blogs.objects.all()
+        if options['category']:
+            queryset = queryset.filter(category=options['category'])
+        if options['author']:
+            queryset = queryset.filter(author__username=options['author'])
+        if options['since']:
+            queryset = queryset.filter(created__gte=parse_datetime(options['since']))
+
+        started = time.perf_counter()
+        rows = 0
+        out = sys.stdout if options['output'] == '-' else open(options['output'], 'w', encoding='utf-8')
+        try:
+            for line in transfer.export_lines(queryset, options['chunk_size']):
+                out.write(line)
+                rows += 1
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+        if not options['verbosity']:
+            return
+        elapsed = time.perf_counter() - started
+        self.stderr.write(self.style.SUCCESS(
+            f'Exported {rows} blogs in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:.0f} rows/s)'
+        ))
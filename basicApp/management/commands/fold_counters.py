@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from basicApp import counters
+
+
+class Command(BaseCommand):
+    help = (
+        'Add the pending sharded view/like/dislike deltas into the Blogs columns. '
+        'Run it periodically while SHARDED_COUNTERS is enabled.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=counters.FOLD_CHUNK_SIZE)
+        parser.add_argument('--every', type=float, help='Keep folding every N seconds instead of once.')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            blogs, rows = counters.fold(chunk_size=options['chunk_size'])
+            self.stdout.write(
+                f'Folded {rows} shard rows into {blogs} blogs in {time.perf_counter() - started:.2f}s'
+            )
+            if not options['every']:
+                return
+            time.sleep(options['every'])
@@ -0,0 +1,56 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from basicApp import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Import blogs from a JSON Lines file (or stdin) as written by export_blogs, '
+        'with batched inserts committed in chunks. Progress per chunk is shown with --verbosity 2.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to read, "-" for stdin.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per INSERT.')
+        parser.add_argument('--chunk-size', type=int, default=10_000, help='Rows per transaction.')
+        parser.add_argument('--update', action='store_true', help='Overwrite blogs whose id already exists.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        def progress(stats):
+            elapsed = time.perf_counter() - started
+            self.stderr.write(f'  {stats["rows"]} rows committed ({stats["rows"] / elapsed:.0f} rows/s)')
+
+        source = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8')
+        try:
+            stats = transfer.import_rows(
+                transfer.read_rows(source),
+                batch_size=options['batch_size'],
+                chunk_size=options['chunk_size'],
+                update=options['update'],
+                progress=progress if options['verbosity'] > 1 else None,
+            )
+        except transfer.InvalidRow as e:
+            # Chunks before the failing one stay committed.
+            raise CommandError(f'{e} (earlier chunks were committed)')
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+        if not options['verbosity']:
+            return
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {stats["rows"]} blogs ({"existing ids updated" if options["update"] else "existing ids skipped"}) '
+            f'in {elapsed:.1f}s '
+            f'({stats["rows"] / elapsed if elapsed else 0:.0f} rows/s, '
+            f'{stats["author_queries"]} author lookups)'
+        ))
+        if stats['unknown_authors']:
+            self.stdout.write(self.style.WARNING(
+                f'{stats["unknown_authors"]} blogs had an unknown author and were imported without one'
+            ))
@@ -0,0 +1,65 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from basicApp import precompute
+from basicApp.models import BlogInteraction, RecommendationList
+
+
+def shards(owners, size):
+    for i in range(0, len(owners), size):
+        yield owners[i:i + size]
+
+
+class Command(BaseCommand):
+    help = (
+        'Precompute ranked scroll-feed candidates for every recently active user '
+        'and guest preference signature, sharded over a process pool.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Only owners active in the last N days.')
+        parser.add_argument('--top', type=int, default=precompute.get_settings()['TOP_N'])
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--shard-size', type=int, default=500)
+        parser.add_argument('--no-guests', action='store_true')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        computed = timezone.now()
+        active = BlogInteraction.objects.filter(created__gte=computed - timedelta(days=options['days']))
+
+        user_ids = list(
+            active.filter(user__isnull=False).order_by().values_list('user_id', flat=True).distinct()
+        )
+        session_keys = [] if options['no_guests'] else list(
+            active.filter(session_key__isnull=False).order_by().values_list('session_key', flat=True).distinct()
+        )
+        jobs = [('user', shard) for shard in shards(user_ids, options['shard_size'])]
+        jobs += [('guest', shard) for shard in shards(session_keys, options['shard_size'])]
+        self.stdout.write(
+            f'{len(user_ids)} users and {len(session_keys)} guest sessions in {len(jobs)} shards, '
+            f'{options["workers"]} workers'
+        )
+
+        # Forked workers must not share the parent's database connections.
+        connections.close_all()
+        stored = 0
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as pool:
+            futures = [pool.submit(precompute.build_shard, kind, owners, options['top']) for kind, owners in jobs]
+            for future in as_completed(futures):
+                rows = future.result()
+                precompute.store(rows, computed)
+                stored += len(rows)
+
+        removed, _ = RecommendationList.objects.filter(computed__lt=computed).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {stored} recommendation lists, removed {removed} stale ones '
+            f'in {time.perf_counter() - started:.1f}s'
+        ))
@@ -0,0 +1,154 @@
+"""
+Serving of uploaded media (``MEDIA_ROOT``) in production.
+
+``serve_media`` answers conditional requests (``ETag``/``Last-Modified``)
+with 304 and single byte ranges with 206. Files stored by
+``ContentAddressedStorage`` never change under their name, so they are
+cached for a year as ``immutable``; anything else must revalidate.
+
+By default Django sends the bytes itself through ``FileResponse``, which
+WSGI servers with ``wsgi.file_wrapper`` (gunicorn, uWSGI) turn into a
+zero-copy ``sendfile()``; ranges keep the real file descriptor, positioned at
+the range start, for the same reason. With a front server configured,
+``MEDIA_SERVING['BACKEND']`` hands the transfer over instead:
+
+* ``'x-sendfile'`` (Apache mod_xsendfile, lighttpd): ``X-Sendfile: <path>``
+* ``'x-accel-redirect'`` (nginx): ``X-Accel-Redirect: <ACCEL_PREFIX><name>``,
+  with an ``internal`` location aliasing ``MEDIA_ROOT`` at ``ACCEL_PREFIX``.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .middleware import IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL
+from .storage import TEMP_PREFIX, is_content_addressed
+
+DEFAULT_SETTINGS = {
+    'BACKEND': 'django',
+    'ACCEL_PREFIX': '/protected-media/',
+}
+BACKENDS = {'django', 'x-sendfile', 'x-accel-redirect'}
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def get_settings():
+    config = {**DEFAULT_SETTINGS, **getattr(settings, 'MEDIA_SERVING', {})}
+    if config['BACKEND'] not in BACKENDS:
+        raise ValueError(f"MEDIA_SERVING['BACKEND'] must be one of {sorted(BACKENDS)}")
+    return config
+
+
+def parse_range(header, size):
+    """
+    ``(start, end)`` (inclusive) of a single ``bytes=`` range, ``None`` to
+    send the whole file (no header, several ranges, or unparseable), and
+    ``False`` when the range lies outside the file.
+    """
+    match = _RANGE_RE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last ``last`` bytes.
+        length = int(last)
+        if not length:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+class RangeFile:
+    """
+    ``length`` bytes of ``file`` from its current position. ``fileno()`` and
+    ``tell()`` expose the real descriptor and offset, which is all a
+    sendfile()-based ``wsgi.file_wrapper`` needs.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Not found')
+    # Half-written uploads are not media yet.
+    if os.path.basename(full_path).startswith(TEMP_PREFIX) or not os.path.isfile(full_path):
+        raise Http404('Not found')
+
+    stat = os.stat(full_path)
+    etag = f'"{int(stat.st_mtime)}-{stat.st_size:x}"'
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        response = file_response(request, path, full_path, stat.st_size, etag)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if is_content_addressed(path) else REVALIDATE_CACHE_CONTROL
+    return response
+
+
+def file_response(request, name, full_path, size, etag):
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+    config = get_settings()
+
+    if config['BACKEND'] != 'django':
+        # The front server does ranges and the transfer; only the headers come from here.
+        response = HttpResponse(content_type=content_type)
+        if config['BACKEND'] == 'x-sendfile':
+            response['X-Sendfile'] = full_path
+        else:
+            response['X-Accel-Redirect'] = config['ACCEL_PREFIX'] + name
+        return response
+
+    byte_range = None
+    if request.method in ('GET', 'HEAD') and request.headers.get('If-Range', etag) == etag:
+        byte_range = parse_range(request.headers.get('Range'), size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        file.seek(start)
+        response = FileResponse(RangeFile(file, end - start + 1), content_type=content_type, status=206)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,311 @@
+import json
+import logging
+import mimetypes
+import os
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.db import connections
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.utils.text import compress_sequence, compress_string
+
+from . import guests
+
+logger = logging.getLogger('basicApp.profiling')
+
+DEFAULT_COMPRESSION = {
+    'ENABLED': True,
+    'MIN_SIZE': 860,
+    'CONTENT_TYPES': [
+        'text/html', 'text/plain', 'text/css', 'text/javascript', 'text/csv', 'text/xml',
+        'application/json', 'application/javascript', 'application/xml',
+        'application/rss+xml', 'application/atom+xml', 'image/svg+xml',
+    ],
+    # Random gzip filename padding against BREACH, as in Django's GZipMiddleware.
+    'MAX_RANDOM_BYTES': 100,
+}
+
+DEFAULT_PROFILING = {
+    'ENABLED': False,
+    'SAMPLE_RATE': 1.0,
+    'N_PLUS_ONE_THRESHOLD': 5,
+    'LOG': True,
+    'HEADER': True,
+}
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?|[\w\'"-]+)\s*,?)+\)', re.IGNORECASE)
+_SPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """
+    Normalise a SQL statement so that queries differing only in their
+    literals (the typical N+1 pattern) share the same fingerprint.
+    """
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+def get_profiling_settings():
+    return {**DEFAULT_PROFILING, **getattr(settings, 'QUERY_PROFILING', {})}
+
+
+class QueryRecorder:
+    """``connection.execute_wrapper`` hook collecting SQL and timings."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self):
+        return {sql: n for sql, n in self.fingerprints.items() if n > 1}
+
+    def n_plus_one(self, threshold):
+        return {sql: n for sql, n in self.fingerprints.items() if n >= threshold}
+
+
+class QueryProfilingMiddleware:
+    """
+    Records query count, DB time and duplicated SQL for a sample of requests.
+
+    Adds a ``Server-Timing`` header (``db`` and ``app`` metrics) and logs one
+    JSON line per profiled request on the ``basicApp.profiling`` logger,
+    flagging fingerprints repeated at least ``N_PLUS_ONE_THRESHOLD`` times.
+    Configured through ``settings.QUERY_PROFILING``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = get_profiling_settings()
+        if not config['ENABLED'] or random.random() >= config['SAMPLE_RATE']:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        n_plus_one = recorder.n_plus_one(config['N_PLUS_ONE_THRESHOLD'])
+        request.query_profile = recorder
+
+        if config['HEADER']:
+            timing = (
+                f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries", '
+                f'app;dur={(total - recorder.duration) * 1000:.1f}'
+            )
+            if response.has_header('Server-Timing'):
+                timing = f"{response['Server-Timing']}, {timing}"
+            response['Server-Timing'] = timing
+
+        if config['LOG']:
+            log = logger.warning if n_plus_one else logger.info
+            log(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': round(total * 1000, 2),
+                'db_ms': round(recorder.duration * 1000, 2),
+                'queries': recorder.count,
+                'duplicates': len(recorder.duplicates()),
+                'n_plus_one': [{'sql': sql, 'count': n} for sql, n in n_plus_one.items()],
+            }))
+        return response
+
+
+# ---- Static files ----
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'public, max-age=60, must-revalidate'
+
+
+class StaticFilesMiddleware:
+    """
+    Serves ``STATIC_ROOT`` when Django is deployed without a front web server
+    doing it (``DEBUG`` off; in development ``runserver`` serves the finders).
+
+    Content-hashed names from the manifest are cached for a year as
+    ``immutable``; anything else must revalidate. Clients accepting gzip get
+    the ``.gz`` copy written by ``CompressedManifestStaticFilesStorage``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL if settings.STATIC_URL.startswith('/') else '/' + settings.STATIC_URL
+        self.hashed_names = frozenset(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+    def __call__(self, request):
+        if (
+            settings.DEBUG
+            or not settings.STATIC_ROOT
+            or request.method not in ('GET', 'HEAD')
+            or not request.path.startswith(self.prefix)
+        ):
+            return self.get_response(request)
+
+        name = request.path[len(self.prefix):]
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except ValueError:
+            return self.get_response(request)
+        if not os.path.isfile(path):
+            return self.get_response(request)
+        return self.serve(request, name, path)
+
+    def serve(self, request, name, path):
+        served = path
+        gzipped = 'gzip' in request.headers.get('Accept-Encoding', '') and os.path.isfile(path + '.gz')
+        if gzipped:
+            served = path + '.gz'
+
+        stat = os.stat(served)
+        etag = f'"{int(stat.st_mtime)}-{stat.st_size:x}"'
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponseNotModified()
+        else:
+            content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+            response = FileResponse(open(served, 'rb'), content_type=content_type)
+            if gzipped:
+                response['Content-Encoding'] = 'gzip'
+            response['Last-Modified'] = http_date(stat.st_mtime)
+        response['ETag'] = etag
+        response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if name in self.hashed_names else REVALIDATE_CACHE_CONTROL
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
+
+# ---- Compression ----
+
+_ACCEPTS_GZIP_RE = re.compile(r'\bgzip\b')
+
+
+def get_compression_settings():
+    return {**DEFAULT_COMPRESSION, **getattr(settings, 'RESPONSE_COMPRESSION', {})}
+
+
+def _counted(sequence, stats, key):
+    for chunk in sequence:
+        stats[key] += len(chunk)
+        yield chunk
+
+
+def _log_when_done(sequence, request, stats):
+    yield from sequence
+    logger.info(json.dumps({
+        'method': request.method,
+        'path': request.path,
+        'streaming': True,
+        'bytes': stats['original'],
+        'compressed_bytes': stats['compressed'],
+    }))
+
+
+class CompressionMiddleware:
+    """
+    Gzips responses of an allow-listed content type once they reach
+    ``MIN_SIZE`` bytes; streaming responses are compressed chunk by chunk.
+
+    Buffered responses report ``original -> compressed`` in ``Server-Timing``;
+    with query profiling enabled, streaming ones log their totals on the
+    ``basicApp.profiling`` logger once fully sent. Configured through
+    ``settings.RESPONSE_COMPRESSION``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        config = get_compression_settings()
+        if not config['ENABLED'] or not self.compressible(response, config):
+            return response
+
+        patch_vary_headers(response, ['Accept-Encoding'])
+        if not _ACCEPTS_GZIP_RE.search(request.headers.get('Accept-Encoding', '')):
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                # Leave async streams (e.g. server-sent events) uncompressed:
+                # buffering inside gzip would hold events back.
+                return response
+            profiling = get_profiling_settings()
+            if profiling['ENABLED'] and profiling['LOG']:
+                stats = {'original': 0, 'compressed': 0}
+                compressed = compress_sequence(
+                    _counted(response.streaming_content, stats, 'original'),
+                    max_random_bytes=config['MAX_RANDOM_BYTES'],
+                )
+                compressed = _log_when_done(_counted(compressed, stats, 'compressed'), request, stats)
+            else:
+                compressed = compress_sequence(
+                    response.streaming_content, max_random_bytes=config['MAX_RANDOM_BYTES'],
+                )
+            response.streaming_content = compressed
+            del response.headers['Content-Length']
+        else:
+            original = len(response.content)
+            compressed = compress_string(response.content, max_random_bytes=config['MAX_RANDOM_BYTES'])
+            if len(compressed) >= original:
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+            timing = f'gzip;desc="{original} -> {len(compressed)} bytes ({len(compressed) / original:.1%})"'
+            if response.has_header('Server-Timing'):
+                timing = f"{response['Server-Timing']}, {timing}"
+            response['Server-Timing'] = timing
+
+        # Byte ranges would refer to the identity body.
+        del response.headers['Accept-Ranges']
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
+
+    @staticmethod
+    def compressible(response, config):
+        if response.has_header('Content-Encoding') or response.status_code in (204, 206, 304):
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in config['CONTENT_TYPES']:
+            return False
+        return response.streaming or len(response.content) >= config['MIN_SIZE']
+
+
+# ---- Guests ----
+
+class GuestCookieMiddleware:
+    """Sends the signed cookie of a guest key handed out by the view (see ``basicApp.guests``)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return guests.set_cookie(request, self.get_response(request))
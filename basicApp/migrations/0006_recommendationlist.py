@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:01
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('basicApp', '0005_alter_blogreaction_reaction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecommendationList',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('owner_key', models.CharField(max_length=64, unique=True)),
+                ('blog_ids', models.BinaryField()),
+                ('computed', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('basicApp', '0006_recommendationlist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlogViewSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(blank=True, null=True)),
+                ('registers', models.BinaryField()),
+                ('blog', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_sketches', to='basicApp.blogs')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('blog', 'day'), name='unique_daily_view_sketch'), models.UniqueConstraint(condition=models.Q(('day__isnull', True)), fields=('blog',), name='unique_total_view_sketch')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-19 21:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def updated_from_created(apps, schema_editor):
+    # Existing posts count as last edited when they were created.
+    Blogs = apps.get_model('basicApp', 'Blogs')
+    Blogs.objects.update(updated=models.F('created'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('basicApp', '0007_blogviewsketch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogs',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(updated_from_created, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('basicApp', '0008_blogs_updated'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogcomment',
+            index=models.Index(fields=['created'], name='basicApp_bl_created_3dc567_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bloginteraction',
+            index=models.Index(fields=['created'], name='basicApp_bl_created_7de258_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogs',
+            index=models.Index(fields=['created'], name='basicApp_bl_created_9a10ec_idx'),
+        ),
+    ]
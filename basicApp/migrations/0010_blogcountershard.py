@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('basicApp', '0009_created_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlogCounterShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('views', models.IntegerField(default=0)),
+                ('likes_count', models.IntegerField(default=0)),
+                ('dislikes_count', models.IntegerField(default=0)),
+                ('blog', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='counter_shards', to='basicApp.blogs')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('blog', 'shard'), name='unique_counter_shard')],
+            },
+        ),
+    ]
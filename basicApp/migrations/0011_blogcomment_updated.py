@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:44
+
+from django.db import migrations, models
+
+
+def updated_from_created(apps, schema_editor):
+    # Existing comments count as last edited when they were written.
+    BlogComment = apps.get_model('basicApp', 'BlogComment')
+    BlogComment.objects.update(updated=models.F('created'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('basicApp', '0010_blogcountershard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogcomment',
+            name='updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(updated_from_created, migrations.RunPython.noop),
+    ]
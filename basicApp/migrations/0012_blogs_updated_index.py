@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('basicApp', '0011_blogcomment_updated'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogs',
+            index=models.Index(fields=['updated'], name='basicApp_bl_updated_680769_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('basicApp', '0012_blogs_updated_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogreaction',
+            index=models.Index(fields=['created'], name='basicApp_bl_created_03dfdf_idx'),
+        ),
+    ]
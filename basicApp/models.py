@@ -1,8 +1,10 @@
 from django.core.checks import Tags
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q
 import uuid
 from django.utils import timezone
 from accounts.models import CustomUser
+from .hll import HyperLogLog, merged_count
 
 # Create your models here.
 class Blogs(models.Model):
@@ -24,12 +26,20 @@ class Blogs(models.Model):
     content = models.TextField()
     tags = models.CharField(max_length=256)
     created = models.DateTimeField(default=timezone.now)
+    # Last edit of the post itself; counter updates leave it alone.
+    updated = models.DateTimeField(auto_now=True)
     author = models.ForeignKey(CustomUser, on_delete=models.CASCADE, blank=True, null=True)
     views = models.PositiveIntegerField(default=0)
     likes_count = models.PositiveIntegerField(default=0)
     dislikes_count = models.PositiveIntegerField(default=0)
     comments_count = models.PositiveIntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created']),
+            models.Index(fields=['updated']),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -51,12 +61,21 @@ class BlogReaction(models.Model):
 
     class Meta:
         unique_together = ('user', 'blog')
+        indexes = [
+            models.Index(fields=['created']),
+        ]
 
 class BlogComment(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     blog = models.ForeignKey(Blogs, on_delete=models.CASCADE, related_name="comments")
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created']),
+        ]
 
     def __str__(self):
         return f"{self.user} on {self.blog}"
@@ -99,8 +118,113 @@ class BlogInteraction(models.Model):
             models.Index(fields=['user']),
             models.Index(fields=['session_key']),
             models.Index(fields=['interaction_type']),
+            models.Index(fields=['created']),
         ]
 
     def __str__(self):
-        return f"{self.interaction_type} - {self.blog.title}"
+        # blog_id rather than the title: no query per row in listings.
+        return f"{self.interaction_type} - {self.blog_id}"
 
+
+class RecommendationList(models.Model):
+    """
+    Ranked scroll-feed candidates precomputed by ``manage.py
+    precompute_recommendations``. ``owner_key`` is ``user:<id>`` or
+    ``guest:<signature>``; ``blog_ids`` packs the UUIDs as 16 raw bytes each.
+    """
+    owner_key = models.CharField(max_length=64, unique=True)
+    blog_ids = models.BinaryField()
+    computed = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.owner_key
+
+
+class BlogViewSketchManager(models.Manager):
+    def record(self, blog_id, visitor, day=None):
+        """
+        Add ``visitor`` to the all-time and daily sketches of a blog and
+        return the ``(total, today)`` unique counts. Repeat visitors leave
+        the registers untouched and cost a single read; only a changed
+        sketch is locked and written back.
+        """
+        day = day or timezone.localdate()
+        sketches = self.filter(Q(day=day) | Q(day__isnull=True), blog_id=blog_id)
+
+        def apply(rows):
+            found = {sketch.day: sketch for sketch in rows}
+            changed, counts = [], []
+            for key in (None, day):
+                sketch = found.get(key) or BlogViewSketch(blog_id=blog_id, day=key)
+                hll = HyperLogLog(sketch.registers if sketch.pk else None)
+                if hll.add(visitor):
+                    sketch.registers = hll.to_bytes()
+                    changed.append(sketch)
+                counts.append(hll.count())
+            return changed, tuple(counts)
+
+        changed, counts = apply(sketches)
+        if not changed:
+            return counts
+        with transaction.atomic():
+            changed, counts = apply(sketches.select_for_update())
+            for sketch in changed:
+                if sketch.pk:
+                    sketch.save(update_fields=['registers'])
+            # A concurrent first visitor may have created the row meanwhile;
+            # the sketch is approximate, so losing that race is acceptable.
+            self.bulk_create([sketch for sketch in changed if not sketch.pk], ignore_conflicts=True)
+        return counts
+
+    def unique_viewers(self, day=None, **filters):
+        """``(total, today)`` unique readers over every sketch matching ``filters``, merged."""
+        day = day or timezone.localdate()
+        totals, today = [], []
+        rows = self.filter(Q(day=day) | Q(day__isnull=True), **filters).values_list('day', 'registers')
+        for sketch_day, registers in rows:
+            (totals if sketch_day is None else today).append(registers)
+        return merged_count(totals), merged_count(today)
+
+
+class BlogViewSketch(models.Model):
+    """
+    HyperLogLog registers of the distinct readers of a blog, all-time
+    (``day`` is null) and per day.
+    """
+    blog = models.ForeignKey(Blogs, on_delete=models.CASCADE, related_name='view_sketches')
+    day = models.DateField(null=True, blank=True)
+    registers = models.BinaryField()
+
+    objects = BlogViewSketchManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['blog', 'day'], name='unique_daily_view_sketch'),
+            models.UniqueConstraint(
+                fields=['blog'], condition=Q(day__isnull=True), name='unique_total_view_sketch',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.blog_id} - {self.day or 'total'}"
+
+
+class BlogCounterShard(models.Model):
+    """
+    Pending view/like/dislike deltas of a blog, spread over a few rows so
+    concurrent writers to a hot post do not queue on its ``Blogs`` row.
+    ``manage.py fold_counters`` adds them into the blog's columns.
+    """
+    blog = models.ForeignKey(Blogs, on_delete=models.CASCADE, related_name='counter_shards')
+    shard = models.PositiveSmallIntegerField()
+    views = models.IntegerField(default=0)
+    likes_count = models.IntegerField(default=0)
+    dislikes_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['blog', 'shard'], name='unique_counter_shard'),
+        ]
+
+    def __str__(self):
+        return f"{self.blog_id} - {self.shard}"
@@ -0,0 +1,177 @@
+"""
+Offline scroll-feed candidate lists.
+
+``manage.py precompute_recommendations`` scores active users and guest
+sessions in shards (one process per shard), turns each preference into a
+ranked stream of blog ids and stores it in ``RecommendationList``.
+The scroll view (see ``basicApp.scroll``) starts from that stream and falls
+back to the live computation for owners without a fresh list.
+
+Many owners share the same preferred/diverse categories, so streams are
+built once per category signature; guests are only stored by signature.
+"""
+import hashlib
+import random
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from . import recommendations
+from .models import Blogs, BlogInteraction, RecommendationList
+
+DEFAULT_SETTINGS = {
+    'TOP_N': 100,
+    'MAX_AGE': 6 * 60 * 60,
+}
+PREFERRED_PER_PAGE = 3
+DIVERSE_PER_PAGE = 2
+
+
+def get_settings():
+    return {**DEFAULT_SETTINGS, **getattr(settings, 'PRECOMPUTED_RECOMMENDATIONS', {})}
+
+
+def encode_ids(ids):
+    return b''.join(uuid.UUID(str(blog_id)).bytes for blog_id in ids)
+
+
+def decode_ids(data):
+    data = bytes(data)
+    return [uuid.UUID(bytes=data[i:i + 16]) for i in range(0, len(data), 16)]
+
+
+def signature(preferred, diverse):
+    return '|'.join(preferred[:PREFERRED_PER_PAGE]) + '/' + '|'.join(diverse[:DIVERSE_PER_PAGE])
+
+
+def user_key(user_id):
+    return f'user:{user_id}'
+
+
+def guest_key(preferred, diverse):
+    return 'guest:' + hashlib.sha1(signature(preferred, diverse).encode()).hexdigest()[:32]
+
+
+def candidate_stream(preferred, diverse, top_n):
+    """
+    Blog ids in the order the scroll feed shows them: pages of three
+    preferred and two diverse posts, shuffled within each page.
+    """
+    def top(categories):
+        return list(
+            Blogs.objects.filter(category__in=categories)
+            .order_by('-views', '-likes_count')
+            .values_list('id', flat=True)[:top_n]
+        )
+
+    pools = [
+        (iter(top(preferred[:PREFERRED_PER_PAGE])), PREFERRED_PER_PAGE),
+        (iter(top(diverse[:DIVERSE_PER_PAGE])), DIVERSE_PER_PAGE),
+    ]
+    rng = random.Random(signature(preferred, diverse))
+    stream, seen = [], set()
+    while len(stream) < top_n:
+        page = []
+        for pool, size in pools:
+            taken = 0
+            for blog_id in pool:
+                if blog_id in seen:
+                    continue
+                seen.add(blog_id)
+                page.append(blog_id)
+                taken += 1
+                if taken == size:
+                    break
+        if not page:
+            break
+        rng.shuffle(page)
+        stream.extend(page)
+    return stream[:top_n]
+
+
+def _recent_by_owner(field, owners, limit, types=None):
+    """Latest ``limit`` ``(category, type)`` pairs of every owner, one windowed query."""
+    queryset = BlogInteraction.objects.filter(**{f'{field}__in': owners})
+    if types:
+        queryset = queryset.filter(interaction_type__in=types)
+    rows = (
+        queryset.annotate(rn=Window(RowNumber(), partition_by=F(field), order_by=F('created').desc()))
+        .filter(rn__lte=limit)
+        .order_by(field, 'rn')
+        .values_list(field, 'blog__category', 'interaction_type')
+    )
+    grouped = defaultdict(list)
+    for owner, category, interaction_type in rows:
+        grouped[owner].append((category, interaction_type))
+    return grouped
+
+
+def build_user_shard(user_ids, top_n):
+    score_rows = recommendations.score_owners('user_id', user_ids, 'scroll')
+    recent = _recent_by_owner(
+        'user_id', user_ids, recommendations.USER_RECENT_VIEWS, types=['view'],
+    )
+    streams, results = {}, []
+    for i, user_id in enumerate(user_ids):
+        recent_views = [category for category, _ in recent.get(user_id, [])]
+        preferred, diverse = recommendations.scroll_categories_from_history(
+            score_rows[i], recent_views, recommendations.USER_MAX_REPEATS,
+        )
+        if not preferred:
+            continue
+        key = signature(preferred, diverse)
+        if key not in streams:
+            streams[key] = encode_ids(candidate_stream(preferred, diverse, top_n))
+        results.append((user_key(user_id), streams[key]))
+    return results
+
+
+def build_guest_shard(session_keys, top_n):
+    recent = _recent_by_owner('session_key', session_keys, recommendations.GUEST_RECENT_INTERACTIONS)
+    results = {}
+    for session_key in session_keys:
+        if not recent.get(session_key):
+            continue
+        preferred, diverse = recommendations.scroll_categories_from_recent(recent[session_key])
+        if not preferred:
+            continue
+        key = guest_key(preferred, diverse)
+        if key not in results:
+            results[key] = encode_ids(candidate_stream(preferred, diverse, top_n))
+    return list(results.items())
+
+
+def build_shard(kind, owners, top_n):
+    """Process-pool entry point: ``(owner_key, packed ids)`` pairs for one shard."""
+    if kind == 'user':
+        return build_user_shard(owners, top_n)
+    return build_guest_shard(owners, top_n)
+
+
+def store(rows, computed):
+    RecommendationList.objects.bulk_create(
+        [RecommendationList(owner_key=key, blog_ids=data, computed=computed) for key, data in rows],
+        update_conflicts=True,
+        unique_fields=['owner_key'],
+        update_fields=['blog_ids', 'computed'],
+        batch_size=500,
+    )
+
+
+def precomputed_ids(owner_key):
+    """The fresh precomputed stream of ``owner_key``, or ``None`` to compute it live."""
+    fresh_since = timezone.now() - timedelta(seconds=get_settings()['MAX_AGE'])
+    data = (
+        RecommendationList.objects
+        .filter(owner_key=owner_key, computed__gte=fresh_since)
+        .values_list('blog_ids', flat=True)
+        .first()
+    )
+    if data is None:
+        return None
+    return decode_ids(data)
@@ -0,0 +1,179 @@
+"""
+Cache-backed rate limiting of write endpoints.
+
+Each scope (``reaction``, ``comment``, ``view`` ...) allows ``N`` requests
+per period per client, using a sliding window approximated from two fixed
+windows: the previous window's count weighted by how much of it still
+overlaps the sliding window, plus the current one. That costs one
+``get_many`` and one ``incr`` per bucket and request.
+
+``BY`` picks the client's bucket:
+
+* ``'user'``: the logged-in member (read through ``AuthenticationMiddleware``,
+  so the session and user are loaded first); anonymous clients as ``'session'``.
+* ``'session'``: the signed guest cookie, checked against its signature only,
+  so a rejected request never touches the database. Session ids cannot be
+  verified without a query and are not used. A client without a valid
+  cookie is handed one, with this request counted in its new bucket.
+* ``'ip'``: the IP address alone.
+
+Every request is also charged to its IP under ``IP_RATE`` (by default
+``IP_FACTOR`` times ``RATE``) and refused once either bucket is full, so a
+client dropping its cookie to get a fresh bucket each time is still held to
+the IP limit. Limits come from ``settings.RATELIMITS``, e.g.::
+
+    RATELIMITS = {'comment': {'RATE': '5/m'}, 'view': {'RATE': '120/m', 'BY': 'ip'}}
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import defaultdict
+from functools import wraps
+
+from django.conf import settings
+from django.http import JsonResponse
+
+from . import guests
+from .cache import get_cache
+
+NAMESPACE = 'ratelimit'
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+DEFAULT_RATELIMITS = {
+    'reaction': {'RATE': '30/m', 'BY': 'user'},
+    'comment': {'RATE': '10/m', 'BY': 'user'},
+    'view': {'RATE': '120/m', 'BY': 'session'},
+}
+# Clients sharing an address (NAT, offices) each get their own bucket, up to this many times RATE per IP.
+IP_FACTOR = 10
+
+_stats = defaultdict(lambda: {'allowed': 0, 'limited': 0})
+_stats_lock = threading.Lock()
+
+
+def parse_rate(rate):
+    """``'30/m'`` -> ``(30, 60)``; the period may carry a multiplier, as in ``'100/15m'``."""
+    count, period = rate.split('/')
+    multiplier = int(period[:-1]) if len(period) > 1 else 1
+    return int(count), multiplier * PERIODS[period[-1]]
+
+
+def get_limits():
+    configured = getattr(settings, 'RATELIMITS', {})
+    return {
+        scope: {**DEFAULT_RATELIMITS.get(scope, {'BY': 'session'}), **configured.get(scope, {})}
+        for scope in {*DEFAULT_RATELIMITS, *configured}
+    }
+
+
+def client_ip(request):
+    if getattr(settings, 'RATELIMIT_TRUST_X_FORWARDED_FOR', False):
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _guest_bucket(key):
+    return 'g:' + hashlib.sha1(key.encode()).hexdigest()[:20]
+
+
+def client_key(request, by):
+    """The bucket of the client, ``None`` for a guest without a valid cookie."""
+    if by == 'ip':
+        return 'ip:' + client_ip(request)
+    if by == 'user' and request.user.is_authenticated:
+        return f'u:{request.user.pk}'
+    key = guests.guest_key(request)
+    return _guest_bucket(key) if key is not None else None
+
+
+def check(request, scope, config):
+    """Count this request against ``scope``; ``(allowed, retry_after_seconds)`` as for ``hit``."""
+    limit, period = parse_rate(config['RATE'])
+    key = client_key(request, config['BY'])
+    if key is None:
+        # Later requests carry the new cookie; start its bucket at this one.
+        key = _guest_bucket(guests.ensure_guest_key(request))
+    allowed, retry_after = hit(scope, key, limit, period)
+    if not allowed or key.startswith('ip:'):
+        return allowed, retry_after
+    ip_limit, ip_period = parse_rate(config['IP_RATE']) if config.get('IP_RATE') else (limit * IP_FACTOR, period)
+    return hit(scope, 'ip:' + client_ip(request), ip_limit, ip_period)
+
+
+def hit(scope, key, limit, period, now=None):
+    """
+    Count one request of ``key`` against ``limit`` per ``period`` seconds.
+    Returns ``(allowed, retry_after_seconds)``; refused requests are not counted.
+    """
+    now = time.time() if now is None else now
+    window = int(now // period)
+    elapsed = (now % period) / period
+    current_key = f'{NAMESPACE}:{scope}:{key}:{window}'
+    previous_key = f'{NAMESPACE}:{scope}:{key}:{window - 1}'
+
+    cache = get_cache(NAMESPACE)
+    counts = cache.get_many([current_key, previous_key])
+    current = counts.get(current_key, 0)
+    weighted = counts.get(previous_key, 0) * (1 - elapsed)
+    if current + weighted + 1 > limit:
+        if current + 1 > limit:
+            retry_after = (1 - elapsed) * period
+        else:
+            # Wait until enough of the previous window has slid out.
+            needed = (current + weighted + 1 - limit) / counts[previous_key]
+            retry_after = needed * period
+        return False, max(1, math.ceil(retry_after))
+
+    if not cache.add(current_key, 1, period * 2):
+        try:
+            cache.incr(current_key)
+        except ValueError:
+            cache.set(current_key, 1, period * 2)
+    return True, 0
+
+
+def _record(scope, allowed):
+    with _stats_lock:
+        _stats[scope]['allowed' if allowed else 'limited'] += 1
+
+
+def get_stats():
+    """Allowed/limited counts per scope in this process, with the configured limits."""
+    with _stats_lock:
+        return {
+            scope: {**_stats.get(scope, {'allowed': 0, 'limited': 0}), 'rate': config.get('RATE')}
+            for scope, config in sorted(get_limits().items())
+        }
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def ratelimit(scope):
+    """
+    View decorator enforcing the ``scope`` limit. Put it outermost (above
+    ``login_required``) so refused requests stop before the view's database
+    work; only ``'user'`` keys load the session and user.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            config = get_limits().get(scope)
+            if config and config.get('RATE') and getattr(settings, 'RATELIMIT_ENABLED', True):
+                allowed, retry_after = check(request, scope, config)
+                _record(scope, allowed)
+                if not allowed:
+                    response = JsonResponse(
+                        {'error': 'Too many requests, please slow down.', 'retry_after': retry_after},
+                        status=429,
+                    )
+                    response['Retry-After'] = str(retry_after)
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
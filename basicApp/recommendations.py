@@ -0,0 +1,210 @@
+"""
+Category scoring shared by the feeds, related posts and the scroll view.
+
+Interactions are reduced to a counts tensor of shape
+``(owners, categories, interaction types)`` where an owner is a user or a
+guest session. A weight profile is a vector over interaction types, so the
+category scores of every owner at once are ``counts @ weights``. Counts for
+whole histories are aggregated in the database (at most
+``categories * types`` rows per owner); "most recent N" windows are built
+from the raw rows.
+"""
+import numpy as np
+from django.db.models import Count
+
+from .models import Blogs, BlogInteraction
+
+CATEGORIES = [choice[0] for choice in Blogs.CATEGORY]
+CATEGORY_INDEX = {category: i for i, category in enumerate(CATEGORIES)}
+
+INTERACTION_TYPES = [choice[0] for choice in BlogInteraction.INTERACTION_CHOICES]
+TYPE_INDEX = {interaction_type: i for i, interaction_type in enumerate(INTERACTION_TYPES)}
+
+
+def _profile(view, like, dislike, comment):
+    weights = np.zeros(len(INTERACTION_TYPES), dtype=np.int64)
+    for interaction_type, weight in (('view', view), ('like', like), ('dislike', dislike), ('comment', comment)):
+        weights[TYPE_INDEX[interaction_type]] = weight
+    return weights
+
+
+WEIGHT_PROFILES = {
+    # Home feed: engagement beyond a view counts most.
+    'feed': _profile(view=1, like=3, dislike=-2, comment=4),
+    # "Related posts" under a blog: what the reader keeps opening.
+    'related': _profile(view=3, like=1, dislike=-4, comment=2),
+    # Scroll view: strong signals, dislikes push a category away.
+    'scroll': _profile(view=3, like=5, dislike=-6, comment=4),
+    # Any interaction at all marks the category as known.
+    'presence': _profile(view=1, like=1, dislike=1, comment=1),
+}
+
+
+def empty_counts(owners=1):
+    return np.zeros((owners, len(CATEGORIES), len(INTERACTION_TYPES)), dtype=np.int64)
+
+
+def counts_from_rows(rows, owner_index=None, owners=1):
+    """
+    Build a counts tensor from ``(owner, category, type[, n])`` rows. Without
+    ``owner_index`` the rows are ``(category, type[, n])`` of a single owner.
+    """
+    counts = empty_counts(owners)
+    owner_idx, category_idx, type_idx, amounts = [], [], [], []
+    for row in rows:
+        if owner_index is None:
+            row = (0,) + tuple(row)
+            position = 0
+        else:
+            position = owner_index.get(row[0])
+        category = CATEGORY_INDEX.get(row[1])
+        if position is None or category is None:
+            continue
+        owner_idx.append(position)
+        category_idx.append(category)
+        type_idx.append(TYPE_INDEX[row[2]])
+        amounts.append(row[3] if len(row) > 3 else 1)
+    if amounts:
+        np.add.at(counts, (owner_idx, category_idx, type_idx), amounts)
+    return counts
+
+
+def scores(counts, profile):
+    """Category scores, shape ``(owners, categories)``."""
+    return counts @ WEIGHT_PROFILES[profile]
+
+
+def rank(score_row, top=None):
+    """Categories with a positive score, best first (ties keep ``Blogs.CATEGORY`` order)."""
+    order = np.argsort(-score_row, kind='stable')
+    order = order[score_row[order] > 0]
+    return [CATEGORIES[i] for i in order[:top]]
+
+
+def _owned(user=None, session_key=None):
+    """Interactions of one user or guest; none (and no query) for a guest without a key yet."""
+    if user is not None:
+        return BlogInteraction.objects.filter(user=user)
+    if session_key is None:
+        return BlogInteraction.objects.none()
+    return BlogInteraction.objects.filter(session_key=session_key)
+
+
+def history_counts(user=None, session_key=None, types=None):
+    """Counts over the whole history of one user or guest session, aggregated in the database."""
+    queryset = _owned(user, session_key)
+    if types:
+        queryset = queryset.filter(interaction_type__in=types)
+    rows = (
+        queryset.order_by()
+        .values_list('blog__category', 'interaction_type')
+        .annotate(n=Count('id'))
+    )
+    return counts_from_rows(rows)
+
+
+def recent_interactions(user=None, session_key=None, types=None, limit=None):
+    """``(category, interaction_type)`` pairs of the latest interactions, newest first."""
+    queryset = _owned(user, session_key)
+    if types:
+        queryset = queryset.filter(interaction_type__in=types)
+    queryset = queryset.order_by('-created').values_list('blog__category', 'interaction_type')
+    if limit is not None:
+        queryset = queryset[:limit]
+    return list(queryset)
+
+
+def preferred_categories(profile, user=None, session_key=None, types=None, limit=None, top=None):
+    """
+    Ranked categories of one user or guest session. With ``limit`` only the
+    latest ``limit`` interactions are scored, otherwise the whole history.
+    """
+    if limit is None:
+        counts = history_counts(user, session_key, types)
+    else:
+        counts = counts_from_rows(recent_interactions(user, session_key, types, limit))
+    return rank(scores(counts, profile)[0], top)
+
+
+def score_owners(field, owners, profile, types=None):
+    """
+    Score many users (``field='user_id'``) or guest sessions
+    (``field='session_key'``) with a single query. Returns the scores matrix,
+    one row per entry of ``owners``.
+    """
+    owners = list(owners)
+    queryset = BlogInteraction.objects.filter(**{f'{field}__in': owners})
+    if types:
+        queryset = queryset.filter(interaction_type__in=types)
+    rows = (
+        queryset.order_by()
+        .values_list(field, 'blog__category', 'interaction_type')
+        .annotate(n=Count('id'))
+    )
+    counts = counts_from_rows(rows, {owner: i for i, owner in enumerate(owners)}, len(owners))
+    return scores(counts, profile)
+
+
+def diverse_categories(preferred, recent_view_categories, max_repeats):
+    """
+    Categories to mix into a feed: not among the two favourites and not seen
+    more than ``max_repeats`` times in the recent views.
+    """
+    seen = np.zeros(len(CATEGORIES), dtype=np.int64)
+    for category in recent_view_categories:
+        if category in CATEGORY_INDEX:
+            seen[CATEGORY_INDEX[category]] += 1
+    overrepresented = {CATEGORIES[i] for i in np.flatnonzero(seen > max_repeats)}
+
+    diverse = [
+        category for category in CATEGORIES
+        if category not in preferred[:2] and category not in overrepresented
+    ]
+    if not diverse:
+        diverse = [category for category in CATEGORIES if category not in preferred[:1]]
+    return diverse
+
+
+# ---- Scroll view ----
+
+USER_RECENT_VIEWS = 10
+USER_MAX_REPEATS = 3
+GUEST_RECENT_INTERACTIONS = 15
+GUEST_RECENT_VIEWS = 8
+GUEST_MAX_REPEATS = 2
+
+
+def scroll_categories_from_history(score_row, recent_view_categories, max_repeats, top=None):
+    preferred = rank(score_row, top)
+    return preferred, diverse_categories(preferred, recent_view_categories, max_repeats)
+
+
+def scroll_categories_user(user):
+    """``(preferred, diverse)`` categories for a logged-in user's scroll feed."""
+    score_row = scores(history_counts(user=user), 'scroll')[0]
+    recent_views = [
+        category for category, _ in
+        recent_interactions(user=user, types=['view'], limit=USER_RECENT_VIEWS)
+    ]
+    return scroll_categories_from_history(score_row, recent_views, USER_MAX_REPEATS)
+
+
+def scroll_categories_from_recent(recent):
+    """
+    ``(preferred, diverse)`` categories from a guest's latest
+    ``(category, interaction_type)`` pairs, newest first.
+    """
+    score_row = scores(counts_from_rows(recent), 'scroll')[0]
+    recent_views = [
+        category for category, interaction_type in recent
+        if interaction_type == 'view'
+    ][:GUEST_RECENT_VIEWS]
+    return scroll_categories_from_history(score_row, recent_views, GUEST_MAX_REPEATS, top=3)
+
+
+def scroll_categories_guest(session_key):
+    """Like ``scroll_categories_user`` for a guest session, ``None`` without any history."""
+    recent = recent_interactions(session_key=session_key, limit=GUEST_RECENT_INTERACTIONS)
+    if not recent:
+        return None
+    return scroll_categories_from_recent(recent)
@@ -0,0 +1,116 @@
+"""
+Server-side state of the scroll view.
+
+A ``ScrollSession`` holds the candidate stream of one reader (packed blog
+ids, best first), a cursor into it and the set of blog ids already shown.
+Pages are cut from the stream in O(page) without touching the ranking
+queries again; only when the stream runs dry is it rebuilt, twice as long,
+skipping everything already seen. Sessions live in the cache and expire
+after ``IDLE_TIMEOUT`` seconds without a request.
+"""
+import uuid
+from array import array
+
+from .cache import get_cache, make_key
+
+NAMESPACE = 'scroll'
+IDLE_TIMEOUT = 30 * 60
+BATCH_SIZE = 5
+STREAM_SIZE = 100
+MAX_STREAM_SIZE = 3200
+
+
+def _short_id(blog_id):
+    # The first 64 bits of a UUID4 are plenty to tell a reader's posts apart.
+    return uuid.UUID(str(blog_id)).int >> 64
+
+
+class ScrollSession:
+    def __init__(self, owner, stream_size=STREAM_SIZE):
+        self.owner = owner
+        self.stream = b''
+        self.cursor = 0
+        self.seen = set()
+        self.stream_size = stream_size
+        self.exhausted = False
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['seen'] = array('Q', sorted(self.seen)).tobytes()
+        return state
+
+    def __setstate__(self, state):
+        seen = array('Q')
+        seen.frombytes(state['seen'])
+        self.__dict__.update(state, seen=set(seen))
+
+    def remaining(self):
+        return len(self.stream) // 16 - self.cursor
+
+    def mark_seen(self, blog_id):
+        self.seen.add(_short_id(blog_id))
+
+    def extend(self, blog_ids):
+        """Replace the consumed part of the stream with the unseen ``blog_ids``."""
+        pending = self.stream[self.cursor * 16:]
+        queued = {int.from_bytes(pending[i:i + 8], 'big') for i in range(0, len(pending), 16)}
+        fresh = []
+        for blog_id in blog_ids:
+            short = _short_id(blog_id)
+            if short not in self.seen and short not in queued:
+                queued.add(short)
+                fresh.append(uuid.UUID(str(blog_id)).bytes)
+        self.stream = pending + b''.join(fresh)
+        self.cursor = 0
+        return len(fresh)
+
+    def refill(self, candidates):
+        blog_ids = candidates(self.stream_size)
+        fresh = self.extend(blog_ids)
+        # A short answer means the source has nothing more to offer.
+        if len(blog_ids) < self.stream_size or not fresh or self.stream_size >= MAX_STREAM_SIZE:
+            self.exhausted = True
+
+    def next_batch(self, size):
+        batch = []
+        while len(batch) < size and self.remaining() > 0:
+            raw = self.stream[self.cursor * 16:(self.cursor + 1) * 16]
+            self.cursor += 1
+            short = int.from_bytes(raw[:8], 'big')
+            if short in self.seen:
+                continue
+            self.seen.add(short)
+            batch.append(uuid.UUID(bytes=raw))
+        return batch
+
+
+def load(owner):
+    return get_cache(NAMESPACE).get(make_key(NAMESPACE, owner))
+
+
+def save(session):
+    get_cache(NAMESPACE).set(make_key(NAMESPACE, session.owner), session, IDLE_TIMEOUT)
+
+
+def next_blog_ids(owner, current_blog_id, restart, candidates, size=BATCH_SIZE):
+    """
+    Ids of the next ``size`` posts for ``owner``.
+
+    ``candidates(n)`` returns the owner's top ``n`` blog ids; it is called
+    when a session starts (or ``restart`` is set) and whenever the stream is
+    used up.
+    """
+    session = None if restart else load(owner)
+    if session is None:
+        session = ScrollSession(owner)
+        session.mark_seen(current_blog_id)
+        session.refill(candidates)
+
+    batch = session.next_batch(size)
+    while len(batch) < size and not session.exhausted:
+        session.stream_size *= 2
+        session.refill(candidates)
+        batch += session.next_batch(size - len(batch))
+
+    save(session)
+    return batch
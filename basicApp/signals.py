@@ -1,32 +1,101 @@
-from django.db.models.signals import post_save, post_delete
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from .models import BlogReaction, Blogs
 from .models import BlogComment
+from .deletion import counter_signals_suppressed
+from .live import publish_counts
+from .cache import bump_version
+from . import autocomplete, catalog, counters
+
+def changed(blog):
+    counters.forget_counts(blog.pk)
+    publish_counts(blog)
+
+
+@receiver(pre_save, sender=BlogReaction)
+def remember_reaction(sender, instance, **kwargs):
+    # Sharded counts move by deltas, so a re-save must know what it replaces.
+    # ``toggle_reaction`` sets this itself and saves the query.
+    if instance._state.adding or not counters.enabled() or hasattr(instance, "_previous_reaction"):
+        return
+    instance._previous_reaction = (
+        BlogReaction.objects.filter(pk=instance.pk).values_list("reaction", flat=True).first()
+    )
 
 @receiver(post_save, sender=BlogReaction)
 def update_reaction_counts(sender, instance, created, **kwargs):
+    if counter_signals_suppressed():
+        return
     blog = instance.blog
-    blog.likes_count = blog.reactions.filter(reaction="like").count()
-    blog.dislikes_count = blog.reactions.filter(reaction="dislike").count()
-    blog.save(update_fields=["likes_count", "dislikes_count"])
+    if counters.enabled():
+        removed = None if created else instance.__dict__.pop("_previous_reaction", None)
+        if removed == instance.reaction:
+            return
+        counters.reaction_changed(blog, added=instance.reaction, removed=removed)
+    else:
+        blog.likes_count = blog.reactions.filter(reaction="like").count()
+        blog.dislikes_count = blog.reactions.filter(reaction="dislike").count()
+        blog.save(update_fields=["likes_count", "dislikes_count"])
+    changed(blog)
 
 @receiver(post_delete, sender=BlogReaction)
 def update_reaction_counts_on_delete(sender, instance, **kwargs):
+    if counter_signals_suppressed():
+        return
     blog = instance.blog
-    blog.likes_count = blog.reactions.filter(reaction="like").count()
-    blog.dislikes_count = blog.reactions.filter(reaction="dislike").count()
-    blog.save(update_fields=["likes_count", "dislikes_count"])
+    if counters.enabled():
+        counters.reaction_changed(blog, removed=instance.reaction)
+    else:
+        blog.likes_count = blog.reactions.filter(reaction="like").count()
+        blog.dislikes_count = blog.reactions.filter(reaction="dislike").count()
+        blog.save(update_fields=["likes_count", "dislikes_count"])
+    changed(blog)
 
 
 @receiver(post_save, sender=BlogComment)
 def update_comment_count(sender, instance, created, **kwargs):
+    if counter_signals_suppressed():
+        return
     if created:
         blog = instance.blog
         blog.comments_count += 1
         blog.save(update_fields=["comments_count"])
+        changed(blog)
 
 @receiver(post_delete, sender=BlogComment)
 def reduce_comment_count(sender, instance, **kwargs):
+    if counter_signals_suppressed():
+        return
     blog = instance.blog
     blog.comments_count -= 1
     blog.save(update_fields=["comments_count"])
+    changed(blog)
+
+
+@receiver(post_save, sender=Blogs)
+def index_blog(sender, instance, update_fields=None, **kwargs):
+    # Counter-only saves keep the terms; scores catch up on the next rebuild.
+    if update_fields and not {"title", "tags"} & set(update_fields):
+        return
+    transaction.on_commit(lambda: autocomplete.index.update(instance))
+
+@receiver(post_delete, sender=Blogs)
+def unindex_blog(sender, instance, **kwargs):
+    blog_id = instance.pk
+    transaction.on_commit(lambda: autocomplete.index.remove(blog_id))
+
+
+COUNTER_FIELDS = {"views", "likes_count", "dislikes_count", "comments_count"}
+
+
+@receiver(post_save, sender=Blogs)
+def refresh_catalog(sender, instance, update_fields=None, **kwargs):
+    # Sitemaps and feeds show no counters.
+    if update_fields and set(update_fields) <= COUNTER_FIELDS:
+        return
+    transaction.on_commit(lambda: bump_version(catalog.NAMESPACE))
+
+@receiver(post_delete, sender=Blogs)
+def refresh_catalog_on_delete(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_version(catalog.NAMESPACE))
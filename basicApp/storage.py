@@ -0,0 +1,158 @@
+"""
+File storages: fingerprinted static files and deduplicated media.
+
+``CompressedManifestStaticFilesStorage`` is Django's manifest storage (every
+file gets a content hash in its name, ``{% static %}`` resolves to it) plus a
+gzip copy, ``<hashed name>.gz``, of each text asset worth compressing. The
+``StaticFilesMiddleware`` in ``basicApp.middleware`` serves those files from
+``STATIC_ROOT`` with far-future immutable caching.
+
+``ContentAddressedStorage`` stores uploads under the SHA-256 of their
+content, so the same image uploaded for ten posts is one file. A file's
+reference count is the number of blogs naming it; ``release`` deletes the
+files that no blog uses any more, except those (re)saved within
+``RELEASE_GRACE_SECONDS``, whose new blog may not have committed yet.
+``manage.py dedupe_media`` sweeps up what that leaves behind.
+"""
+import gzip
+import hashlib
+import os
+import re
+import tempfile
+import time
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.storage import FileSystemStorage
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.json', '.svg', '.txt', '.xml', '.html', '.map', '.ico'}
+MIN_COMPRESS_SIZE = 512
+DIGEST_NAME_RE = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$')
+# How long after an upload its file is safe from ``release``.
+RELEASE_GRACE_SECONDS = 5 * 60
+# Uploads stream to a temporary file with this prefix before being renamed into place.
+TEMP_PREFIX = '.upload-'
+
+
+def compressible(name):
+    return os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # Rewrite url() and @import references only: the vendored Bootstrap files
+    # point at source maps that are not shipped, which would fail the build.
+    patterns = (
+        ('*.css', ManifestStaticFilesStorage.patterns[0][1][:2]),
+    )
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            compressed = self.compress(name)
+            if compressed:
+                yield name, compressed, True
+
+    def compress(self, name):
+        """Write ``name.gz`` next to ``name`` when it saves space, return its name."""
+        if not compressible(name) or not self.exists(name):
+            return None
+        path = self.path(name)
+        if os.path.getsize(path) < MIN_COMPRESS_SIZE:
+            return None
+        with open(path, 'rb') as source:
+            data = source.read()
+        # mtime=0 keeps the output byte-identical across deploys.
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(compressed) >= len(data):
+            return None
+        with open(path + '.gz', 'wb') as target:
+            target.write(compressed)
+        return name + '.gz'
+
+
+
+def is_content_addressed(name):
+    """Whether ``name`` was stored by ``ContentAddressedStorage`` (its bytes never change)."""
+    return bool(DIGEST_NAME_RE.search(name))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Saves ``images/photo.JPG`` as ``images/3f/3f9a...c1.jpg``. The upload is
+    hashed while it streams to a temporary file next to its destination,
+    which is then renamed into place, or dropped if that content is stored
+    already.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the content, see _save().
+        return name
+
+    def digest_name(self, name, digest):
+        directory, basename = os.path.split(name)
+        extension = os.path.splitext(basename)[1].lower()
+        return os.path.join(directory, digest[:2], digest + extension).replace('\\', '/')
+
+    def _save(self, name, content):
+        directory = os.path.dirname(self.path(name))
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=TEMP_PREFIX)
+        try:
+            with os.fdopen(fd, 'wb') as temp:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp.write(chunk)
+
+            name = self.digest_name(name, digest.hexdigest())
+            full_path = self.path(name)
+            try:
+                # Stored already: mark it as just uploaded so ``release`` leaves it alone.
+                os.utime(full_path)
+                return name
+            except FileNotFoundError:
+                pass
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            # Atomic: a concurrent upload of the same bytes writes the same file.
+            os.replace(temp_path, full_path)
+            return name
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+def release(names):
+    """
+    Delete the files of ``names`` that no blog references any more; call it
+    after the transaction that dropped the references has committed.
+    Returns the names deleted.
+    """
+    from .models import Blogs
+    default = Blogs._meta.get_field('featureImage').default
+    names = {name for name in names if name and name != default}
+    if not names:
+        return []
+    storage = Blogs._meta.get_field('featureImage').storage
+    in_use = set(Blogs.objects.filter(featureImage__in=names).values_list('featureImage', flat=True))
+    cutoff = time.time() - RELEASE_GRACE_SECONDS
+    deleted = []
+    for name in sorted(names - in_use):
+        if is_content_addressed(name):
+            # An identical upload reuses the stored file without writing it, and
+            # its blog may commit after the query above; _save() touches the
+            # file, so recent ones are kept. An upload landing between this
+            # check and the delete can still lose its file: the window is a
+            # stat() wide, not a transaction.
+            try:
+                if os.path.getmtime(storage.path(name)) > cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+        storage.delete(name)
+        deleted.append(name)
+    return deleted
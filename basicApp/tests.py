@@ -1,3 +1,1030 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from .models import (
+    Blogs, BlogComment, BlogCounterShard, BlogInteraction, BlogReaction, BlogViewSketch, RecommendationList,
+)
+from . import autocomplete, catalog, counters, guests, live, middleware, precompute, ratelimit, transfer, views
+from . import storage as media_storage
+from . import cache as cache_layer
+from .cache import get_version
+
+
+@override_settings(
+    QUERY_PROFILING={'ENABLED': False},
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class AppTestCase(TestCase):
+    """Profiling off and a fast password hasher; subclasses add their own settings."""
+
+
+class BlogDataTestCase(AppTestCase):
+    """An author, a reader and a hot post, plus ``grow`` to add data around them."""
+
+    SMALL = 2
+    LARGE = 30
+
+    def setUp(self):
+        for alias in caches:
+            caches[alias].clear()
+        # Give the guest client a key up front so the budgets measure the
+        # returning-visitor path.
+        self.guest_session = 'returning-guest'
+        self.client.cookies[guests.COOKIE_NAME] = guests.sign(self.guest_session)
+        self.author = CustomUser.objects.create_user('author', 'author@example.com', 'pw')
+        self.reader = CustomUser.objects.create_user('reader', 'reader@example.com', 'pw')
+        self.hot = Blogs.objects.create(
+            title='Hot post', category='Technology', content='Body', tags='hot', author=self.author, views=1000,
+        )
+        self.rows = 0
+
+    def grow(self, rows):
+        """Add blogs, reactions, comments and interactions until there are ``rows`` of each."""
+        categories = [choice[0] for choice in Blogs.CATEGORY]
+        for i in range(self.rows, rows):
+            user = CustomUser.objects.create_user(f'user{i}', f'user{i}@example.com', 'pw')
+            blog = Blogs.objects.create(
+                title=f'Post {i}', category=categories[i % len(categories)], content='Body',
+                tags='tag', author=self.author, views=i,
+            )
+            BlogReaction.objects.create(user=user, blog=self.hot, reaction='like')
+            BlogComment.objects.create(user=user, blog=self.hot, text='Nice')
+            BlogComment.objects.create(user=self.reader, blog=blog, text='Nice')
+            for interaction_type in ('view', 'like', 'comment', 'dislike'):
+                BlogInteraction.objects.create(user=self.reader, blog=blog, interaction_type=interaction_type)
+                BlogInteraction.objects.create(session_key=self.guest_session, blog=blog, interaction_type=interaction_type)
+        self.rows = max(self.rows, rows)
+
+    def count_queries(self, func):
+        for alias in caches:
+            caches[alias].clear()
+        with CaptureQueriesContext(connection) as ctx:
+            result = func()
+            if hasattr(result, 'content'):
+                self.assertLess(result.status_code, 500)
+            else:
+                list(result)
+        return len(ctx.captured_queries)
+
+    def assertQueryBudget(self, budget, func):
+        for rows in (self.SMALL, self.LARGE):
+            self.grow(rows)
+            queries = self.count_queries(func)
+            self.assertLessEqual(
+                queries, budget,
+                f'{queries} queries with {rows} rows of data, budget is {budget}',
+            )
+
+    def member_client(self):
+        self.client.force_login(self.reader)
+        return self.client
+
+    def admin_client(self):
+        self.author.is_staff = self.author.is_superuser = True
+        self.author.save()
+        self.client.force_login(self.author)
+        return self.client
+
+
+class QueryBudgetTests(BlogDataTestCase):
+    """
+    Pin the number of queries of every endpoint and recommendation helper.
+
+    Each scenario runs against a small dataset and again after the dataset
+    has grown well past the budget, so a path that becomes O(N) in queries
+    (lazy foreign keys, per-row signals, per-category loops...) fails here.
+    """
+
+    # ---- Recommendation helpers ----
+
+    def test_get_user_feed(self):
+        # The category scores, then the blogs themselves.
+        self.assertQueryBudget(2, lambda: views.get_user_feed(self.reader))
+
+    def test_get_guest_feed(self):
+        self.assertQueryBudget(2, lambda: views.get_guest_feed(self.guest_session))
+
+    def test_get_user_recommendations(self):
+        self.assertQueryBudget(2, lambda: views.get_user_recommendations(self.reader, self.hot.id))
+
+    def test_get_guest_recommendations(self):
+        self.assertQueryBudget(2, lambda: views.get_guest_recommendations(self.guest_session, self.hot.id))
+
+    def test_scroll_candidates_user(self):
+        # Precomputed list, category scores, recent views, preferred and diverse candidates.
+        self.assertQueryBudget(5, lambda: views.scroll_candidates_user(self.reader, 100))
+
+    def test_scroll_candidates_guest(self):
+        self.assertQueryBudget(4, lambda: views.scroll_candidates_guest(self.guest_session, 100))
+
+    def test_get_diverse_trending_blogs(self):
+        # One query per category on a cold cache, then the overall top list and the fetch.
+        self.assertQueryBudget(len(Blogs.CATEGORY) + 2, lambda: views.get_diverse_trending_blogs(self.hot.id, 0))
+
+    def test_get_diverse_trending_blogs_warm_cache(self):
+        self.grow(self.SMALL)
+        views.get_diverse_trending_blogs(self.hot.id, 0)
+        with self.assertNumQueries(1):
+            views.get_diverse_trending_blogs(self.hot.id, 0)
+
+    def test_get_user_reactions(self):
+        blogs = list(Blogs.objects.all()[:self.LARGE])
+        self.assertQueryBudget(1, lambda: views.get_user_reactions(self.reader, blogs))
+
+    # ---- Endpoints ----
+
+    def test_blogs_guest(self):
+        self.assertQueryBudget(3, lambda: self.client.get('/blogs/'))
+
+    def test_blogs_member(self):
+        client = self.member_client()
+        self.assertQueryBudget(5, lambda: client.get('/blogs/'))
+
+    def test_blog_guest(self):
+        self.assertQueryBudget(6, lambda: self.client.get(f'/blog/{self.hot.id}/'))
+
+    def test_blog_member(self):
+        client = self.member_client()
+        self.assertQueryBudget(9, lambda: client.get(f'/blog/{self.hot.id}/'))
+
+    def test_record_view(self):
+        client = self.member_client()
+        # Five of these are the first visit writing the unique-viewer sketches.
+        self.assertQueryBudget(12, lambda: client.post(f'/blog/{self.hot.id}/view/'))
+
+    def test_get_next_blogs_guest(self):
+        self.assertQueryBudget(
+            5, lambda: self.client.get('/api/get-next-blogs/', {'current_blog_id': self.hot.id}),
+        )
+
+    def test_get_next_blogs_member(self):
+        client = self.member_client()
+        self.assertQueryBudget(
+            9, lambda: client.get('/api/get-next-blogs/', {'current_blog_id': self.hot.id, 'offset': 0}),
+        )
+
+    def test_scroll_view(self):
+        client = self.member_client()
+        self.assertQueryBudget(4, lambda: client.get('/scrollView/'))
+
+    def test_toggle_reaction(self):
+        client = self.member_client()
+        self.assertQueryBudget(11, lambda: client.post(f'/blog/{self.hot.id}/reaction/like/'))
+
+    def test_add_comment(self):
+        client = self.member_client()
+        self.assertQueryBudget(
+            6, lambda: client.post(f'/blog/{self.hot.id}/add-comment/', {'comment_text': 'Budget'}),
+        )
+
+    def test_delete_comment(self):
+        client = self.member_client()
+
+        def delete_comment():
+            comment = BlogComment.objects.create(user=self.reader, blog=self.hot, text='Temporary')
+            return client.post(f'/comment/{comment.id}/delete/')
+
+        # Two of these queries are the comment creation above.
+        self.assertQueryBudget(10, delete_comment)
+
+    def test_manage_blog(self):
+        self.client.force_login(self.author)
+        self.assertQueryBudget(4, lambda: self.client.get('/manageBlog/'))
+
+    def test_dashboard(self):
+        self.client.force_login(self.author)
+        self.assertQueryBudget(9, lambda: self.client.get('/accounts/dashboard/'))
+
+    def test_comments(self):
+        self.client.force_login(self.author)
+        self.assertQueryBudget(5, lambda: self.client.get('/accounts/comments/'))
+
+
+class GuestCookieTests(BlogDataTestCase):
+    def test_new_guest_gets_a_cookie_not_a_session(self):
+        client = self.client_class()
+        client.get('/blogs/')
+        client.get(f'/blog/{self.hot.id}/')
+        self.assertNotIn(guests.COOKIE_NAME, client.cookies)
+
+        client.post(f'/blog/{self.hot.id}/view/')
+        key = client.cookies[guests.COOKIE_NAME].value
+        client.post(f'/blog/{self.hot.id}/view/')
+        client.get('/api/get-next-blogs/', {'current_blog_id': self.hot.id})
+        self.assertEqual(client.cookies[guests.COOKIE_NAME].value, key)
+        recorded = BlogInteraction.objects.filter(blog=self.hot, user=None).exclude(session_key=self.guest_session)
+        self.assertEqual(len(recorded), 2)
+        self.assertEqual(len({interaction.session_key for interaction in recorded}), 1)
+        self.assertFalse(Session.objects.exists())
+
+
+class BlogETagTests(BlogDataTestCase):
+    def test_blog_not_modified(self):
+        self.grow(self.SMALL)
+        client = self.member_client()
+        etag = client.get(f'/blog/{self.hot.id}/')['ETag']
+        # Session, user, the version lookup and the related posts; nothing is rendered.
+        with self.assertNumQueries(5):
+            response = client.get(f'/blog/{self.hot.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        comment = BlogComment.objects.create(user=self.reader, blog=self.hot, text='New')
+        response = client.get(f'/blog/{self.hot.id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        comment.text = 'Edited'
+        comment.save()
+        self.assertEqual(client.get(f'/blog/{self.hot.id}/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_blog_etag_follows_the_readers_history(self):
+        self.grow(self.LARGE)
+        url = f'/blog/{self.hot.id}/'
+        etags = set()
+        for category in ('Travel', 'Food'):
+            guest = self.client_class()
+            guest.cookies[guests.COOKIE_NAME] = guests.sign(f'reader-of-{category}')
+            for blog in Blogs.objects.filter(category=category)[:3]:
+                BlogInteraction.objects.create(
+                    blog=blog, session_key=f'reader-of-{category}', interaction_type='view',
+                )
+            etags.add(guest.get(url)['ETag'])
+        self.assertEqual(len(etags), 2)
+
+
+class ViewSketchTests(BlogDataTestCase):
+    def test_record_view_repeat_visit_skips_sketch_writes(self):
+        client = self.member_client()
+        client.post(f'/blog/{self.hot.id}/view/')
+        with CaptureQueriesContext(connection) as ctx:
+            data = client.post(f'/blog/{self.hot.id}/view/').json()
+        self.assertFalse(any('view_sketch' in q['sql'] and 'SELECT' not in q['sql'] for q in ctx.captured_queries))
+        self.assertEqual(data['views'], 1002)
+        self.assertEqual(data['unique_viewers'], 1)
+        self.assertEqual(BlogViewSketch.objects.filter(blog=self.hot).count(), 2)
+
+
+class ScrollSessionTests(BlogDataTestCase):
+    def test_get_next_blogs_rejects_bad_parameters(self):
+        for params in ({'current_blog_id': 'nope'}, {'current_blog_id': self.hot.id, 'offset': 'x'}):
+            self.assertEqual(self.client.get('/api/get-next-blogs/', params).status_code, 400)
+
+    def test_get_next_blogs_later_pages(self):
+        self.grow(self.LARGE)
+        client = self.member_client()
+        params = {'current_blog_id': self.hot.id, 'offset': 0}
+        shown = [blog['id'] for blog in client.get('/api/get-next-blogs/', params).json()['blogs']]
+
+        # Later pages come from the scroll session: session, user, blogs, reactions.
+        params['offset'] = len(shown)
+        with self.assertNumQueries(4):
+            response = client.get('/api/get-next-blogs/', params)
+        shown += [blog['id'] for blog in response.json()['blogs']]
+
+        while response.json()['has_more']:
+            params['offset'] = len(shown)
+            response = client.get('/api/get-next-blogs/', params)
+            shown += [blog['id'] for blog in response.json()['blogs']]
+        self.assertEqual(len(shown), len(set(shown)))
+        self.assertNotIn(str(self.hot.id), shown)
+
+
+class InlineExecutor:
+    """Runs pool jobs in the calling process, where the test database is visible."""
+
+    def __init__(self, max_workers=None, initializer=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+class PrecomputeTests(BlogDataTestCase):
+    def test_get_next_blogs_precomputed(self):
+        self.grow(self.LARGE)
+        precompute.store(precompute.build_user_shard([self.reader.pk], 50), timezone.now())
+        client = self.member_client()
+        # Session, user, the precomputed list, the blogs and the reactions.
+        with self.assertNumQueries(5):
+            response = client.get('/api/get-next-blogs/', {'current_blog_id': self.hot.id, 'offset': 0})
+        self.assertEqual(len(response.json()['blogs']), 5)
+
+    def test_command_stores_user_and_guest_lists(self):
+        self.grow(self.LARGE)
+        stale = timezone.now() - timedelta(days=1)
+        RecommendationList.objects.create(owner_key='user:0', blog_ids=b'', computed=stale)
+        with mock.patch(
+            'basicApp.management.commands.precompute_recommendations.ProcessPoolExecutor', InlineExecutor,
+        ):
+            call_command('precompute_recommendations', shard_size=7, stdout=open(os.devnull, 'w'))
+
+        keys = set(RecommendationList.objects.values_list('owner_key', flat=True))
+        user_key = precompute.user_key(self.reader.pk)
+        self.assertIn(user_key, keys)
+        # One guest session, stored under its category signature.
+        guest_keys = [key for key in keys if key.startswith('guest:')]
+        self.assertEqual(len(guest_keys), 1)
+        self.assertEqual(keys, {user_key, *guest_keys})
+        for key in keys:
+            ids = precompute.precomputed_ids(key)
+            self.assertTrue(ids)
+            self.assertEqual(Blogs.objects.filter(id__in=ids).count(), len(ids))
+
+
+class BlogCountsTests(BlogDataTestCase):
+    def test_blog_counts(self):
+        self.grow(self.LARGE)
+        client = self.member_client()
+        ids = ','.join(str(i) for i in Blogs.objects.values_list('id', flat=True)[:20])
+        # Session, user, the counters and the reader's reactions.
+        self.assertQueryBudget(4, lambda: client.get('/api/blog-counts/', {'ids': ids}))
+        with self.assertNumQueries(3):
+            counts = client.get('/api/blog-counts/', {'ids': ids}).json()['counts']
+        self.assertEqual(len(counts), 20)
+        self.assertNotIn('content', next(iter(counts.values())))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(f'/blog/{self.hot.id}/reaction/like/')
+        hot = client.get('/api/blog-counts/', {'ids': str(self.hot.id)}).json()['counts'][str(self.hot.id)]
+        self.assertEqual(hot['user_reaction'], 'like')
+        self.assertEqual(hot['likes_count'], self.hot.reactions.filter(reaction='like').count())
+
+
+class ChunkedDeletionTests(BlogDataTestCase):
+    def test_delete_blog(self):
+        self.client.force_login(self.author)
+
+        def delete_hot():
+            response = self.client.post(f'/deleteBlog/{self.hot.id}/')
+            self.hot.save(force_insert=True)
+            return response
+
+        # Cost per dependent table and per chunk, not per row. The count
+        # includes re-creating the post afterwards.
+        self.assertQueryBudget(28, delete_hot)
+
+    def test_delete_blogs_bulk_only_own_posts(self):
+        self.grow(self.SMALL)
+        others = Blogs.objects.create(title='Not mine', category='Food', content='Body', tags='t', author=self.reader)
+        own = list(Blogs.objects.filter(author=self.author).values_list('id', flat=True))
+        self.client.force_login(self.author)
+        self.client.post('/deleteBlogs/', {'blog_ids': [str(blog_id) for blog_id in own] + [str(others.id)]})
+        self.assertFalse(Blogs.objects.filter(author=self.author).exists())
+        self.assertTrue(Blogs.objects.filter(id=others.id).exists())
+        self.assertFalse(BlogComment.objects.filter(blog_id__in=own).exists())
+        self.assertFalse(BlogInteraction.objects.filter(blog_id__in=own).exists())
+
+        self.client.post(f'/deleteBlog/{others.id}/')
+        self.assertTrue(Blogs.objects.filter(id=others.id).exists())
+        self.client.force_login(self.reader)
+        self.client.post(f'/deleteBlog/{others.id}/')
+        self.assertFalse(Blogs.objects.filter(id=others.id).exists())
+
+
+class CsvExportTests(BlogDataTestCase):
+    def test_export_stats(self):
+        self.client.force_login(self.author)
+
+        def export():
+            response = self.client.get('/accounts/dashboard/export.csv')
+            self.assertEqual(response['Content-Type'], 'text/csv')
+            lines = b''.join(response.streaming_content).decode().splitlines()
+            self.assertEqual(lines[0].split(',')[:2], ['blog_id', 'title'])
+            return response
+
+        # Session, user, the blogs and one daily aggregate per chunk of blogs.
+        self.assertQueryBudget(4, export)
+
+
+class TimeSeriesTests(BlogDataTestCase):
+    def test_stats_timeseries(self):
+        self.client.force_login(self.author)
+        # Session, user and the bucketed aggregate (cache cleared each run).
+        self.assertQueryBudget(3, lambda: self.client.get('/accounts/dashboard/timeseries/', {'bucket': 'hour'}))
+
+    def test_stats_timeseries_downsamples(self):
+        self.grow(self.SMALL)
+        self.client.force_login(self.author)
+        data = self.client.get(
+            '/accounts/dashboard/timeseries/', {'bucket': 'hour', 'max_points': 10},
+        ).json()
+        self.assertLessEqual(len(data['timestamps']), 10)
+        self.assertEqual(data['step_seconds'] % 3600, 0)
+        self.assertEqual(data['totals']['view'], sum(data['series']['view']))
+        self.assertEqual(data['totals']['view'], BlogInteraction.objects.filter(interaction_type='view').count())
+
+        blog = Blogs.objects.exclude(id=self.hot.id).first()
+        data = self.client.get('/accounts/dashboard/timeseries/', {'blog': blog.id}).json()
+        self.assertEqual(data['totals']['like'], BlogInteraction.objects.filter(blog=blog, interaction_type='like').count())
+        self.assertEqual(self.client.get('/accounts/dashboard/timeseries/', {'bucket': 'year'}).status_code, 400)
+
+
+class AdminTests(BlogDataTestCase):
+    def test_admin_changelists(self):
+        client = self.admin_client()
+        # Session, user, row estimate, count, rows and two date-hierarchy queries.
+        for model in ('blogs', 'blogreaction', 'blogcomment', 'bloginteraction'):
+            with self.subTest(model=model):
+                self.assertQueryBudget(7, lambda: client.get(f'/admin/basicApp/{model}/'))
+        with CaptureQueriesContext(connection) as ctx:
+            client.get('/admin/basicApp/blogs/')
+        self.assertFalse(any('"basicApp_blogs"."content"' in q['sql'] for q in ctx.captured_queries))
+
+    def test_admin_delete_and_recount(self):
+        self.grow(self.SMALL)
+        client = self.admin_client()
+        reactions = list(BlogReaction.objects.filter(blog=self.hot).values_list('pk', flat=True))
+        client.post('/admin/basicApp/blogreaction/', {
+            'action': 'delete_and_recount', '_selected_action': reactions,
+        })
+        self.hot.refresh_from_db()
+        self.assertEqual(self.hot.likes_count, 0)
+        self.assertFalse(BlogReaction.objects.exists())
+
+
+class StaticAssetTests(AppTestCase):
+    def test_collectstatic_serves_hashed_gzip_with_immutable_caching(self):
+        with tempfile.TemporaryDirectory() as root, override_settings(
+            DEBUG=False,
+            STATIC_ROOT=root,
+            STORAGES={
+                **settings.STORAGES,
+                'staticfiles': {'BACKEND': 'basicApp.storage.CompressedManifestStaticFilesStorage'},
+            },
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            hashed = staticfiles_storage.stored_name('css/bootstrap.css')
+            self.assertNotEqual(hashed, 'css/bootstrap.css')
+
+            response = self.client.get(f'/static/{hashed}', HTTP_ACCEPT_ENCODING='gzip, br')
+            body = b''.join(response.streaming_content)
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(response['Content-Type'], 'text/css')
+            self.assertIn('immutable', response['Cache-Control'])
+            with open(staticfiles_storage.path(hashed), 'rb') as original:
+                self.assertEqual(gzip.decompress(body), original.read())
+
+            response = self.client.get(
+                f'/static/{hashed}', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'],
+            )
+            self.assertEqual(response.status_code, 304)
+
+            response = self.client.get('/static/css/bootstrap.css')
+            self.assertNotIn('Content-Encoding', response)
+            self.assertNotIn('immutable', response['Cache-Control'])
+
+
+class CompressionTests(AppTestCase):
+    def setUp(self):
+        author = CustomUser.objects.create_user('author', 'author@example.com', 'pw')
+        self.blog = Blogs.objects.create(
+            title='Long post', category='Technology', content='Lorem ipsum ' * 500, tags='t', author=author,
+        )
+
+    def test_large_html_is_gzipped_with_ratio_in_server_timing(self):
+        response = self.client.get(f'/blog/{self.blog.id}/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('gzip;desc=', response['Server-Timing'])
+        self.assertIn(b'Long post', gzip.decompress(response.content))
+
+    def test_small_or_unaccepted_responses_are_left_alone(self):
+        response = self.client.get(f'/blog/{self.blog.id}/')
+        self.assertNotIn('Content-Encoding', response)
+        response = self.client.post(f'/blog/{self.blog.id}/reaction/like/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+
+
+class TransferTests(TestCase):
+    def test_export_import_round_trip(self):
+        author = CustomUser.objects.create_user('author', 'author@example.com', 'pw')
+        for i in range(25):
+            Blogs.objects.create(title=f'Post {i}', category='Travel', content='Body', tags='t', author=author, views=i)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'blogs.jsonl')
+            call_command('export_blogs', output=path, verbosity=0)
+            with open(path) as fh:
+                rows = [json.loads(line) for line in fh]
+            self.assertEqual(len(rows), 25)
+            self.assertEqual(rows[0]['author'], 'author')
+
+            Blogs.objects.all().delete()
+            with open(path, 'a') as fh:
+                fh.write(json.dumps({'title': 'Guest post', 'content': 'Body', 'author': 'nobody'}) + '\n')
+            # Three chunks of savepoint, INSERT, release; the author lookups
+            # are cached, so only the first batch and the unknown name query.
+            with self.assertNumQueries(3 * 3 + 2):
+                call_command('import_blogs', path, batch_size=10, chunk_size=10, verbosity=0)
+
+        self.assertEqual(Blogs.objects.count(), 26)
+        self.assertEqual(Blogs.objects.filter(author=author).count(), 25)
+        self.assertEqual(Blogs.objects.get(id=rows[7]['id']).views, 7)
+
+    def test_update_import_refreshes_updated_and_caches(self):
+        blog = Blogs.objects.create(title='Old title', category='Travel', content='Old')
+        Blogs.objects.filter(id=blog.id).update(updated=timezone.now() - timezone.timedelta(days=1))
+        self.assertEqual([title for _, title in autocomplete.index.search('old')], ['Old title'])
+        catalog_version = get_version(catalog.NAMESPACE)
+
+        row = {**transfer.blog_to_row(blog), 'title': 'New title', 'content': 'New'}
+        transfer.import_rows(transfer.read_rows([json.dumps(row)]), update=True)
+
+        blog.refresh_from_db()
+        self.assertEqual(blog.content, 'New')
+        self.assertGreater(blog.updated, timezone.now() - timezone.timedelta(minutes=1))
+        self.assertNotEqual(get_version(catalog.NAMESPACE), catalog_version)
+        self.assertEqual(autocomplete.index.search('old'), [])
+
+
+@override_settings(RATELIMITS={'reaction': {'RATE': '3/m'}})
+class RateLimitTests(AppTestCase):
+    def setUp(self):
+        for alias in caches:
+            caches[alias].clear()
+        ratelimit.reset_stats()
+        self.user = CustomUser.objects.create_user('reader', 'reader@example.com', 'pw')
+        self.blog = Blogs.objects.create(title='Post', category='Food', content='Body', tags='t', author=self.user)
+        self.client.force_login(self.user)
+
+    def test_excess_writes_get_429_without_the_views_work(self):
+        url = f'/blog/{self.blog.id}/reaction/like/'
+        for _ in range(3):
+            self.assertEqual(self.client.post(url).status_code, 200)
+        # Only the session and user behind the member's bucket.
+        with self.assertNumQueries(2):
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        # Other clients have their own budget.
+        self.assertEqual(self.client_class().post(url).status_code, 302)
+        self.assertEqual(ratelimit.get_stats()['reaction'], {'allowed': 4, 'limited': 1, 'rate': '3/m'})
+
+    def test_members_are_limited_across_devices(self):
+        url = f'/blog/{self.blog.id}/reaction/like/'
+        other_device = self.client_class()
+        other_device.force_login(self.user)
+        for _ in range(3):
+            self.client.post(url)
+        self.assertEqual(other_device.post(url).status_code, 429)
+
+    @override_settings(RATELIMITS={'view': {'RATE': '2/m', 'IP_RATE': '3/m'}})
+    def test_forged_or_dropped_cookies_are_capped_per_ip(self):
+        url = f'/blog/{self.blog.id}/view/'
+        statuses = []
+        for _ in range(4):
+            forged = self.client_class()
+            forged.cookies['sessionid'] = uuid.uuid4().hex
+            forged.cookies['guest_id'] = uuid.uuid4().hex
+            statuses.append(forged.post(url).status_code)
+        self.assertEqual(statuses, [200, 200, 200, 429])
+
+    def test_new_guest_is_counted_once(self):
+        url = f'/blog/{self.blog.id}/view/'
+        guest = self.client_class()
+        with override_settings(RATELIMITS={'view': {'RATE': '2/m'}}):
+            self.assertEqual([guest.post(url).status_code for _ in range(3)], [200, 200, 429])
+        # The guest's own bucket, not the IP, limited the third request.
+        self.assertEqual(self.client_class().post(url).status_code, 200)
+
+    def test_sliding_window_weights_previous_window(self):
+        for i in range(3):
+            self.assertTrue(ratelimit.hit('t', 'k', 3, 60, now=60 * 10 + i)[0])
+        # Halfway through the next window half of the previous one still counts.
+        self.assertFalse(ratelimit.hit('t', 'k', 3, 60, now=60 * 11 + 10)[0])
+        self.assertTrue(ratelimit.hit('t', 'k', 3, 60, now=60 * 11 + 30)[0])
+
+    def test_monitoring_stats_is_staff_only(self):
+        self.assertEqual(self.client.get('/api/stats/').status_code, 302)
+        self.user.is_staff = True
+        self.user.save()
+        self.assertIn('ratelimit', self.client.get('/api/stats/').json())
+
+
+class LiveCountsTests(AppTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user('reader', 'reader@example.com', 'pw')
+        self.blog = Blogs.objects.create(title='Post', category='Food', content='Body', tags='t', author=self.user)
+
+    def test_write_is_published_once_to_every_subscriber(self):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        queues = [live.broadcaster.subscribe([self.blog.id], loop=loop) for _ in range(2)]
+        self.client.force_login(self.user)
+        published = live.broadcaster.published
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/blog/{self.blog.id}/reaction/like/')
+        self.assertEqual(live.broadcaster.published, published + 1)
+        loop.run_until_complete(asyncio.sleep(0))
+        expected = {'id': str(self.blog.id), 'likes': 1, 'dislikes': 0, 'comments': 0}
+        for queue in queues:
+            self.assertEqual(queue.get_nowait(), expected)
+            live.broadcaster.unsubscribe([self.blog.id], queue)
+        self.assertEqual(live.broadcaster.get_stats()['subscriptions'], 0)
+
+    async def test_stream_pushes_published_counts(self):
+        response = await self.async_client.get(f'/api/live-counts/?ids={self.blog.id}')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await anext(stream)).startswith(b'retry:'))
+        self.assertIn(b'"likes": 0', await anext(stream))
+        live.broadcaster.publish(self.blog.id, {'likes': 5, 'dislikes': 1, 'comments': 2})
+        self.assertIn(b'"likes": 5', await anext(stream))
+
+    @override_settings(SHARDED_COUNTERS={'ENABLED': True, 'SHARDS': 4})
+    async def test_snapshot_includes_pending_shards(self):
+        await sync_to_async(counters.increment)(self.blog.id, likes_count=2)
+        response = await self.async_client.get(f'/api/live-counts/?ids={self.blog.id}')
+        stream = aiter(response.streaming_content)
+        await anext(stream)
+        self.assertIn(b'"likes": 2', await anext(stream))
+
+    def test_wsgi_fallback_and_validation(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/api/live-counts/?ids={self.blog.id}')
+        # No content: EventSource gives up instead of polling.
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client.get('/api/live-counts/?ids=nope').status_code, 400)
+        self.assertEqual(self.client.get('/api/live-counts/').status_code, 400)
+
+
+@override_settings(SHARDED_COUNTERS={'ENABLED': True, 'SHARDS': 4})
+class ShardedCounterTests(AppTestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user('reader', 'reader@example.com', 'pw')
+        self.blog = Blogs.objects.create(title='Post', category='Food', content='Body', tags='t', author=self.user)
+        self.client.force_login(self.user)
+
+    def test_writes_go_to_shards_and_fold_into_the_row(self):
+        for _ in range(10):
+            self.client.post(f'/blog/{self.blog.id}/view/')
+        self.client.post(f'/blog/{self.blog.id}/reaction/like/')
+        response = self.client.post(f'/blog/{self.blog.id}/reaction/dislike/')
+        self.assertEqual((response.json()['likes'], response.json()['dislikes']), (0, 1))
+
+        self.blog.refresh_from_db()
+        self.assertEqual((self.blog.views, self.blog.likes_count, self.blog.dislikes_count), (0, 0, 0))
+        self.assertEqual(counters.fresh_counts(self.blog.id)['views'], 10)
+        self.assertContains(self.client.get(f'/blog/{self.blog.id}/'), '<span id="dislikes-count">1</span>')
+
+        blogs, rows = counters.fold()
+        self.assertEqual(blogs, 1)
+        self.assertLessEqual(rows, 4)
+        self.assertFalse(BlogCounterShard.objects.exists())
+        self.blog.refresh_from_db()
+        self.assertEqual((self.blog.views, self.blog.likes_count, self.blog.dislikes_count), (10, 0, 1))
+
+    def test_resaving_a_reaction_keeps_the_counts(self):
+        reaction = BlogReaction.objects.create(user=self.user, blog=self.blog, reaction=BlogReaction.LIKE)
+        reaction.save()
+        BlogReaction.objects.get(pk=reaction.pk).save()
+        counts = counters.fresh_counts(self.blog.id)
+        self.assertEqual((counts['likes_count'], counts['dislikes_count']), (1, 0))
+        reaction.reaction = BlogReaction.DISLIKE
+        reaction.save()
+        counts = counters.fresh_counts(self.blog.id)
+        self.assertEqual((counts['likes_count'], counts['dislikes_count']), (0, 1))
+
+    def test_unknown_blog_is_not_counted(self):
+        self.assertFalse(counters.increment(uuid.uuid4(), views=1))
+        self.assertFalse(BlogCounterShard.objects.exists())
+
+
+class ContentAddressedStorageTests(AppTestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.user = CustomUser.objects.create_user('writer', 'writer@example.com', 'pw')
+        self.client.force_login(self.user)
+
+    def create(self, data, filename='Logo.JPG'):
+        self.client.post('/createBlog/', {
+            'title': 'Post', 'category': 'Food', 'content': 'Body',
+            'featureImage': SimpleUploadedFile(filename, data, content_type='image/jpeg'),
+        })
+        return Blogs.objects.latest('created')
+
+    def test_identical_uploads_share_one_file_until_unreferenced(self):
+        first, second = self.create(b'logo bytes'), self.create(b'logo bytes', 'copy.jpg')
+        name = first.featureImage.name
+        self.assertEqual(name, second.featureImage.name)
+        self.assertRegex(name, r'^images/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$')
+        storage = first.featureImage.storage
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/editBlog/{first.id}/', {
+                'title': 'Post', 'category': 'Food', 'content': 'Body',
+                'featureImage': SimpleUploadedFile('new.jpg', b'other bytes', content_type='image/jpeg'),
+            })
+        self.assertTrue(storage.exists(name))
+
+        with mock.patch.object(media_storage, 'RELEASE_GRACE_SECONDS', 0), self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/deleteBlog/{second.id}/')
+        self.assertFalse(storage.exists(name))
+        first.refresh_from_db()
+        self.assertTrue(storage.exists(first.featureImage.name))
+
+    def test_release_spares_a_file_an_upload_just_reused(self):
+        name = self.create(b'logo bytes').featureImage.name
+        path = self.create(b'logo bytes').featureImage.path
+        os.utime(path, (0, 0))
+        Blogs.objects.all().delete()
+        # An identical upload whose blog has not committed yet touches the file.
+        media_storage.ContentAddressedStorage().save('images/again.jpg', SimpleUploadedFile('again.jpg', b'logo bytes'))
+        self.assertEqual(media_storage.release([name]), [])
+        self.assertTrue(os.path.exists(path))
+
+        os.utime(path, (0, 0))
+        call_command('dedupe_media', stdout=open(os.devnull, 'w'))
+        self.assertFalse(os.path.exists(path))
+
+    def test_sweep_follows_the_upload_directory(self):
+        field = Blogs._meta.get_field('featureImage')
+        with mock.patch.object(field, 'upload_to', 'covers/%Y/'):
+            path = self.create(b'cover bytes').featureImage.path
+        self.assertIn(f'{os.sep}covers{os.sep}', path)
+        Blogs.objects.all().delete()
+        os.utime(path, (0, 0))
+        call_command('dedupe_media', stdout=open(os.devnull, 'w'))
+        self.assertTrue(os.path.exists(path))
+        with mock.patch.object(field, 'upload_to', 'covers/%Y/'):
+            call_command('dedupe_media', stdout=open(os.devnull, 'w'))
+        self.assertFalse(os.path.exists(path))
+
+
+class MediaServingTests(AppTestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.name = 'images/ab/' + 'ab' * 32 + '.jpg'
+        os.makedirs(os.path.join(media.name, 'images/ab'))
+        with open(os.path.join(media.name, self.name), 'wb') as fh:
+            fh.write(bytes(range(256)) * 4)
+
+    def test_ranges_conditional_requests_and_caching(self):
+        url = f'/media/{self.name}'
+        response = self.client.get(url)
+        self.assertEqual(len(b''.join(response.streaming_content)), 1024)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('immutable', response['Cache-Control'])
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        partial = self.client.get(url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial['Content-Range'], 'bytes 10-19/1024')
+        self.assertEqual(b''.join(partial.streaming_content), bytes(range(10, 20)))
+        self.assertEqual(b''.join(self.client.get(url, HTTP_RANGE='bytes=-4').streaming_content), bytes(range(252, 256)))
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=2000-').status_code, 416)
+        # A stale If-Range gets the whole file.
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"old"').status_code, 200)
+        self.assertEqual(self.client.get('/media/../settings.py').status_code, 404)
+
+    def test_upload_temp_files_are_not_served(self):
+        temp_name = f'images/{media_storage.TEMP_PREFIX}x1y2z3'
+        with open(os.path.join(settings.MEDIA_ROOT, temp_name), 'wb') as fh:
+            fh.write(b'partial')
+        self.assertEqual(self.client.get(f'/media/{temp_name}').status_code, 404)
+
+    def test_offload_to_front_server(self):
+        with override_settings(MEDIA_SERVING={'BACKEND': 'x-accel-redirect', 'ACCEL_PREFIX': '/protected/'}):
+            response = self.client.get(f'/media/{self.name}')
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected/{self.name}')
+        self.assertEqual(response.content, b'')
+
+
+class AutocompleteTests(AppTestCase):
+    def setUp(self):
+        autocomplete.index.built_at = None
+        self.popular = Blogs.objects.create(
+            title='Django tips', category='Technology', content='x', tags='python', views=50,
+        )
+        self.quiet = Blogs.objects.create(title='Dining in Rome', category='Travel', content='x', tags='food', views=1)
+
+    def titles(self, query):
+        return [r['title'] for r in self.client.get('/api/autocomplete/', {'q': query}).json()['results']]
+
+    def test_prefix_search_ranked_by_popularity_without_queries(self):
+        self.assertEqual(self.titles('d'), ['Django tips', 'Dining in Rome'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.titles('ROME'), ['Dining in Rome'])
+            self.assertEqual(self.titles('pyth'), ['Django tips'])
+            self.assertEqual(self.titles('zzz'), [])
+        self.assertGreater(autocomplete.index.stats()['memory_bytes'], 0)
+
+    def test_index_follows_edits_and_deletes(self):
+        self.titles('d')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.quiet.title = 'Roman holiday'
+            self.quiet.save()
+            Blogs.objects.create(title='Dutch ovens', category='Food', content='x', tags='', views=5)
+        self.assertEqual(self.titles('d'), ['Django tips', 'Dutch ovens'])
+        self.assertEqual(self.titles('holi'), ['Roman holiday'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.popular.delete()
+        self.assertEqual(self.titles('django'), [])
+
+    def test_updates_during_a_rebuild_survive_it(self):
+        late = Blogs(title='Late arrival', tags='', views=0, likes_count=0)
+        real_terms_of = autocomplete.terms_of
+
+        def terms_of(title, tags):
+            if title == 'Django tips':
+                # Committed after the rebuild read its rows.
+                autocomplete.index.update(late)
+            return real_terms_of(title, tags)
+
+        self.titles('d')
+        with mock.patch.object(autocomplete, 'terms_of', terms_of):
+            autocomplete.index.build()
+        self.assertEqual(self.titles('late'), ['Late arrival'])
+
+    def test_stale_index_is_served_while_another_thread_rebuilds(self):
+        self.titles('d')
+        autocomplete.index.built_at -= autocomplete.MAX_AGE + 1
+        with autocomplete.index._build_lock, self.assertNumQueries(0):
+            self.assertEqual(self.titles('din'), ['Dining in Rome'])
+
+
+class CatalogTests(AppTestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.blogs = [
+            Blogs.objects.create(title=f'Post {i}', category='Travel' if i % 2 else 'Food', content='x')
+            for i in range(5)
+        ]
+
+    def test_sitemap_is_split_into_streamed_parts(self):
+        with mock.patch.object(catalog, 'SITEMAP_CHUNK_SIZE', 2):
+            index = self.client.get('/sitemap.xml')
+            self.assertEqual(index.content.count(b'<sitemap>'), 3)
+            parts = [self.client.get(f'/sitemap-{n}.xml') for n in (1, 2, 3)]
+            self.assertEqual(self.client.get('/sitemap-4.xml').status_code, 404)
+        self.assertTrue(all(part.streaming for part in parts))
+        listed = b''.join(b''.join(part.streaming_content) for part in parts)
+        for blog in self.blogs:
+            self.assertEqual(listed.count(str(blog.id).encode()), 1)
+        with self.assertNumQueries(1):
+            response = self.client.get('/sitemap.xml', HTTP_IF_NONE_MATCH=index['ETag'])
+        self.assertEqual(response.status_code, 304)
+        # A write this process's cache never heard of still changes the ETag.
+        Blogs.objects.filter(id=self.blogs[0].id).update(title='Edited', updated=timezone.now())
+        self.assertEqual(self.client.get('/sitemap.xml', HTTP_IF_NONE_MATCH=index['ETag']).status_code, 200)
+
+    def test_feeds_are_cached_until_a_post_changes(self):
+        response = self.client.get('/feeds/food/atom/')
+        self.assertContains(response, 'Post 0')
+        self.assertNotContains(response, 'Post 1')
+        self.assertIn('atom', response['Content-Type'])
+        self.assertEqual(self.client.get('/feeds/nope/rss/').status_code, 404)
+        with self.assertNumQueries(1):
+            self.client.get('/feeds/food/atom/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Blogs.objects.create(title='Fresh dish', category='Food', content='x')
+        self.assertContains(self.client.get('/feeds/food/atom/'), 'Fresh dish')
+        self.assertContains(self.client.get('/feeds/all/rss/'), 'Fresh dish')
+
+    @override_settings(ALLOWED_HOSTS=['*'])
+    def test_feeds_are_not_cached_for_unlisted_hosts(self):
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get('/feeds/food/rss/', HTTP_HOST='any.example')
+            # Rendered every time, never stored under an attacker-chosen key.
+            self.assertIn('LIMIT 50', ctx.captured_queries[-1]['sql'])
+
+
+class CacheLayerTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        cache_layer.reset_stats()
+        self.computes = 0
+
+    def compute(self, value='v', delay=0):
+        def compute():
+            self.computes += 1
+            time.sleep(delay)
+            return f'{value}{self.computes}'
+        return compute
+
+    def test_concurrent_misses_compute_once(self):
+        results = []
+        compute = self.compute(delay=0.1)
+        threads = [
+            threading.Thread(target=lambda: results.append(cache_layer.get_or_compute('test', 'k', compute)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.computes, 1)
+        self.assertEqual(results, ['v1'] * 8)
+
+    def test_soft_ttl_and_early_refresh(self):
+        with mock.patch.object(cache_layer.time, 'time', return_value=1000.0) as now, \
+                mock.patch.object(cache_layer.random, 'random', return_value=0.999):
+            self.assertEqual(cache_layer.get_or_compute('test', 'k', self.compute(), timeout=100, soft_timeout=10), 'v1')
+            now.return_value = 1005.0
+            self.assertEqual(cache_layer.get_or_compute('test', 'k', self.compute(), timeout=100, soft_timeout=10), 'v1')
+            # Past the soft TTL the caller refreshes.
+            now.return_value = 1011.0
+            self.assertEqual(cache_layer.get_or_compute('test', 'k', self.compute(), timeout=100, soft_timeout=10), 'v2')
+
+            # A slow value draws an early refresh well before its soft expiry.
+            full_key = cache_layer.make_key('test', 'k')
+            caches['default'].set(full_key, ('slow', 1030.0, 5.0))
+            now.return_value = 1020.0
+            self.assertEqual(cache_layer.get_or_compute('test', 'k', self.compute()), 'slow')
+            with mock.patch.object(cache_layer.random, 'random', return_value=0.01):
+                self.assertEqual(cache_layer.get_or_compute('test', 'k', self.compute()), 'v3')
+
+    def test_bump_version_invalidates_the_namespace_and_stats_count(self):
+        cache_layer.get_or_compute('test', 'k', self.compute())
+        cache_layer.get_or_compute('test', 'k', self.compute())
+        cache_layer.get_or_compute('other', 'k', self.compute())
+        cache_layer.bump_version('test')
+        self.assertEqual(cache_layer.get_or_compute('test', 'k', self.compute()), 'v3')
+        self.assertEqual(cache_layer.get_or_compute('other', 'k', self.compute()), 'v2')
+
+        stats = cache_layer.get_stats()['test']
+        self.assertEqual((stats['hits'], stats['misses'], stats['computes']), (1, 2, 2))
+        self.assertAlmostEqual(stats['hit_ratio'], 1 / 3)
+
+
+def n_plus_one_view(request):
+    """Fetches each author separately: the pattern the profiler must flag."""
+    names = [blog.author.username for blog in Blogs.objects.all()]
+    return HttpResponse(', '.join(names))
+
+
+urlpatterns = [path('n-plus-one/', n_plus_one_view)]
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    QUERY_PROFILING={'ENABLED': True, 'N_PLUS_ONE_THRESHOLD': 5},
+)
+class QueryProfilingTests(AppTestCase):
+    def test_fingerprint_drops_literals(self):
+        self.assertEqual(
+            middleware.fingerprint("SELECT *  FROM t WHERE id = 5 AND name = 'it''s' AND k IN (1, 2, 3)"),
+            'SELECT * FROM t WHERE id = ? AND name = ? AND k IN (...)',
+        )
+
+    def test_n_plus_one_is_flagged_with_server_timing(self):
+        for i in range(6):
+            author = CustomUser.objects.create_user(f'author{i}', f'author{i}@example.com', 'pw')
+            Blogs.objects.create(title=f'Post {i}', category='Food', content='x', author=author)
+
+        with self.assertLogs('basicApp.profiling', 'WARNING') as logs:
+            response = self.client.get('/n-plus-one/')
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="7 queries", app;dur=[\d.]+')
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry['queries'], 7)
+        [flagged] = entry['n_plus_one']
+        self.assertEqual(flagged['count'], 6)
+        self.assertIn('FROM "accounts_customuser"', flagged['sql'])
+        self.assertIn('LIMIT ?', flagged['sql'])
+
+    @override_settings(QUERY_PROFILING={'ENABLED': False}, ROOT_URLCONF='ZapuzaDjangoBasicApp.urls')
+    def test_compressed_streams_are_not_logged_without_profiling(self):
+        Blogs.objects.create(title='Post', category='Food', content='x')
+        with self.assertNoLogs('basicApp.profiling'):
+            response = self.client.get('/sitemap-1.xml', HTTP_ACCEPT_ENCODING='gzip')
+            b''.join(response.streaming_content)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
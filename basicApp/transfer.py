@@ -0,0 +1,181 @@
+"""
+JSON Lines import/export of blogs for ``manage.py import_blogs`` and
+``manage.py export_blogs``.
+
+One blog per line, in the shape of the ``get_next_blogs`` API (``id``,
+``title``, ``category``, ``featureImage``, ``content``, ``tags``,
+``created``, ``author`` as a username, ``views``) except that ``created`` is
+ISO 8601 and ``featureImage`` the stored file name. Both directions stream:
+rows are read, converted and written in fixed-size batches, so memory does
+not grow with the file.
+"""
+import json
+import uuid
+from datetime import datetime
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from . import autocomplete, catalog
+from .cache import bump_version
+from .counters import COUNTS_NAMESPACE
+from .models import Blogs
+
+CATEGORIES = {choice[0] for choice in Blogs.CATEGORY}
+UPDATE_FIELDS = ['title', 'category', 'featureImage', 'content', 'tags', 'created', 'updated', 'author', 'views']
+
+
+class InvalidRow(ValueError):
+    """A line that cannot be turned into a blog; carries its line number."""
+
+    def __init__(self, line_number, message):
+        super().__init__(f'line {line_number}: {message}')
+        self.line_number = line_number
+
+
+def blog_to_row(blog):
+    return {
+        'id': str(blog.id),
+        'title': blog.title,
+        'category': blog.category,
+        'featureImage': blog.featureImage.name if blog.featureImage else '',
+        'content': blog.content,
+        'tags': blog.tags,
+        'created': blog.created.isoformat(),
+        'author': blog.author.username if blog.author else None,
+        'views': blog.views,
+    }
+
+
+def export_lines(queryset, chunk_size=2000):
+    """JSON lines of ``queryset``, fetched ``chunk_size`` rows at a time."""
+    for blog in queryset.select_related('author').order_by('created', 'id').iterator(chunk_size=chunk_size):
+        yield json.dumps(blog_to_row(blog), ensure_ascii=False) + '\n'
+
+
+def parse_created(value):
+    if not value:
+        return timezone.now()
+    try:
+        created = datetime.fromisoformat(value)
+    except ValueError:
+        # The display format used by the scroll API, e.g. "March 05, 2025".
+        created = datetime.strptime(value, '%B %d, %Y')
+    if timezone.is_naive(created):
+        created = timezone.make_aware(created)
+    return created
+
+
+class AuthorCache:
+    """
+    Username to user id lookups, resolved a batch at a time with one query
+    for the names not seen yet. Holds at most ``max_size`` names.
+    """
+
+    def __init__(self, max_size=100_000):
+        self.ids = {}
+        self.max_size = max_size
+        self.queries = 0
+
+    def resolve(self, usernames):
+        missing = {name for name in usernames if name and name not in self.ids}
+        if missing:
+            if len(self.ids) + len(missing) > self.max_size:
+                self.ids.clear()
+            found = dict(CustomUser.objects.filter(username__in=missing).values_list('username', 'id'))
+            self.queries += 1
+            for name in missing:
+                self.ids[name] = found.get(name)
+
+    def get(self, username):
+        return self.ids.get(username) if username else None
+
+
+def row_to_blog(row, line_number, authors):
+    try:
+        title = str(row['title'])
+        content = str(row['content'])
+    except KeyError as e:
+        raise InvalidRow(line_number, f'missing field {e}')
+    category = row.get('category') or 'Other'
+    if category not in CATEGORIES:
+        raise InvalidRow(line_number, f'unknown category {category!r}')
+    try:
+        blog_id = uuid.UUID(str(row['id'])) if row.get('id') else uuid.uuid4()
+        created = parse_created(row.get('created'))
+        views = int(row.get('views') or 0)
+    except (TypeError, ValueError) as e:
+        raise InvalidRow(line_number, str(e))
+    return Blogs(
+        id=blog_id,
+        title=title[:256],
+        category=category,
+        featureImage=row.get('featureImage') or 'default.png',
+        content=content,
+        tags=str(row.get('tags') or '')[:256],
+        created=created,
+        updated=timezone.now(),
+        author_id=authors.get(row.get('author')),
+        views=max(views, 0),
+    )
+
+
+def read_rows(lines):
+    """``(line_number, dict)`` for every non-blank line of a JSON Lines stream."""
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            raise InvalidRow(line_number, f'invalid JSON ({e})')
+        if not isinstance(row, dict):
+            raise InvalidRow(line_number, 'expected a JSON object')
+        yield line_number, row
+
+
+def import_rows(rows, batch_size=1000, chunk_size=10_000, update=False, progress=None):
+    """
+    Insert the blogs of ``rows`` (from ``read_rows``) with one ``bulk_create``
+    per ``batch_size`` rows and one transaction per ``chunk_size`` rows.
+    Existing ids are skipped, or overwritten with ``update``. Calls
+    ``progress(stats)`` after every committed chunk and returns the stats.
+    """
+    stats = {'rows': 0, 'unknown_authors': 0, 'author_queries': 0}
+    authors = AuthorCache()
+    conflict = (
+        {'update_conflicts': True, 'unique_fields': ['id'], 'update_fields': UPDATE_FIELDS}
+        if update else {'ignore_conflicts': True}
+    )
+
+    def flush(batch):
+        authors.resolve(row.get('author') for _, row in batch)
+        blogs = [row_to_blog(row, line_number, authors) for line_number, row in batch]
+        stats['unknown_authors'] += sum(
+            1 for (_, row), blog in zip(batch, blogs) if row.get('author') and blog.author_id is None
+        )
+        Blogs.objects.bulk_create(blogs, **conflict)
+        stats['rows'] += len(blogs)
+
+    rows = iter(rows)
+    batch = list(islice(rows, batch_size))
+    while batch:
+        with transaction.atomic():
+            in_chunk = 0
+            while batch and in_chunk < chunk_size:
+                flush(batch)
+                in_chunk += len(batch)
+                batch = list(islice(rows, batch_size))
+        stats['author_queries'] = authors.queries
+        if progress:
+            progress(stats)
+
+    stats['author_queries'] = authors.queries
+    if stats['rows']:
+        # ``bulk_create`` sends no signals: invalidate what the Blogs receivers would have.
+        for namespace in ('trending', catalog.NAMESPACE, COUNTS_NAMESPACE, autocomplete.NAMESPACE):
+            bump_version(namespace)
+    return stats
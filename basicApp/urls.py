@@ -1,5 +1,6 @@
 from django.urls import path
-from .views import home, blogs, scrollView, get_next_blogs, createBlog, manageBlog, editBlog, deleteBlog, blog, toggle_reaction, add_comment, delete_comment
+from .catalog import category_feed, sitemap_index, sitemap_part
+from .views import home, blogs, scrollView, get_next_blogs, createBlog, manageBlog, editBlog, deleteBlog, deleteBlogs, blog, record_view, toggle_reaction, add_comment, delete_comment, autocomplete_titles, blog_counts, live_counts, monitoring_stats
 
 urlpatterns = [
     path('', home, name='home'),
@@ -7,11 +8,20 @@ urlpatterns = [
     path('scrollView/', scrollView, name='scrollView'),
     path('api/get-next-blogs/', get_next_blogs, name='get_next_blogs'),
     path('blog/<uuid:id>/', blog, name='blog'),
+    path('blog/<uuid:id>/view/', record_view, name='record_view'),
     path('createBlog/', createBlog, name='createBlog'),
     path('manageBlog/', manageBlog, name='manageBlog'),
     path('editBlog/<uuid:id>/', editBlog, name='editBlog'),
     path('deleteBlog/<uuid:id>/', deleteBlog, name='deleteBlog'),
+    path('deleteBlogs/', deleteBlogs, name='deleteBlogs'),
     path('blog/<uuid:id>/reaction/<str:reaction_type>/', toggle_reaction, name='toggle_reaction'),
     path('blog/<str:id>/add-comment/', add_comment, name='add_comment'),
     path('comment/<int:comment_id>/delete/', delete_comment, name='delete_comment'),
+    path('api/autocomplete/', autocomplete_titles, name='autocomplete_titles'),
+    path('api/blog-counts/', blog_counts, name='blog_counts'),
+    path('api/live-counts/', live_counts, name='live_counts'),
+    path('api/stats/', monitoring_stats, name='monitoring_stats'),
+    path('sitemap.xml', sitemap_index, name='sitemap_index'),
+    path('sitemap-<int:part>.xml', sitemap_part, name='sitemap_part'),
+    path('feeds/<slug:category>/<str:kind>/', category_feed, name='category_feed'),
 ]
\ No newline at end of file
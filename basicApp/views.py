@@ -1,33 +1,29 @@
-from django.db import models
+from django.db import models, transaction
 from django.shortcuts import render, redirect, get_object_or_404
 from django.core.paginator import Paginator, EmptyPage
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from .models import Blogs, BlogReaction, BlogComment, BlogInteraction
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import ValidationError
+from .models import Blogs, BlogReaction, BlogComment, BlogInteraction, BlogViewSketch
+from .hll import visitor_key
+from .storage import release
+from .cache import get_or_compute, get_stats as get_cache_stats
+from .ratelimit import ratelimit, get_stats as get_ratelimit_stats
+from . import autocomplete, counters, deletion, guests, live, precompute, recommendations, scroll
 from django.http import JsonResponse
-from django.db.models import F
-from django.db.models import Case, When, IntegerField, Sum, Value
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import ensure_csrf_cookie
+from django.views.decorators.http import condition, require_GET, require_POST
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+import hashlib
+import time
+from django.urls import reverse
+from django.db.models import Case, When, IntegerField, OuterRef, Subquery, Value
 
 def get_user_feed(user):
-    interactions = (
-        BlogInteraction.objects
-        .filter(user=user)
-        .values('blog__category')
-        .annotate(
-            score=Sum(
-                Case(
-                    When(interaction_type='view', then=1),
-                    When(interaction_type='like', then=3),
-                    When(interaction_type='comment', then=4),
-                    When(interaction_type='dislike', then=-2),
-                    output_field=IntegerField()
-                )
-            )
-        )
-        .order_by('-score')
-    )
-
-    top_categories = [i['blog__category'] for i in interactions if i['score'] > 0][:3]
+    top_categories = recommendations.preferred_categories('feed', user=user, top=3)
 
     if not top_categories:
         return Blogs.objects.order_by('-views', '-likes_count')
@@ -38,56 +34,32 @@ def get_user_feed(user):
 
 
 def get_guest_feed(session_key):
-    recent = BlogInteraction.objects.filter(
-        session_key=session_key,
-        interaction_type='view'
-    ).order_by('-created')[:5]
+    categories = recommendations.preferred_categories(
+        'feed', session_key=session_key, types=['view'], limit=5
+    )
 
-    if not recent:
+    if not categories:
         return Blogs.objects.order_by('-views', '-likes_count')
 
-    categories = [i.blog.category for i in recent]
-
     return Blogs.objects.filter(
         category__in=categories
     ).order_by('-views', '-likes_count')
 
 def get_user_recommendations(user, exclude_blog_id):
-    interactions = (
-        BlogInteraction.objects
-        .filter(user=user)
-        .values('blog__category')
-        .annotate(
-            score=Sum(
-                Case(
-                    When(interaction_type='view', then=3),
-                    When(interaction_type='like', then=1),
-                    When(interaction_type='comment', then=2),
-                    When(interaction_type='dislike', then=-4),
-                    output_field=IntegerField()
-                )
-            )
-        )
-        .order_by('-score')
-    )
-
-    top_categories = [i['blog__category'] for i in interactions if i['score'] > 0][:2]
+    top_categories = recommendations.preferred_categories('related', user=user, top=2)
 
     return Blogs.objects.filter(
         category__in=top_categories
     ).exclude(id=exclude_blog_id)[:9]
 
 def get_guest_recommendations(session_key, exclude_blog_id):
-    recent = BlogInteraction.objects.filter(
-        session_key=session_key,
-        interaction_type='view'
-    ).order_by('-created')[:9]
+    categories = recommendations.preferred_categories(
+        'related', session_key=session_key, types=['view'], limit=9
+    )
 
-    if not recent:
+    if not categories:
         return Blogs.objects.exclude(id=exclude_blog_id).order_by('-views')[:9]
 
-    categories = [i.blog.category for i in recent]
-
     return Blogs.objects.filter(
         category__in=categories
     ).exclude(id=exclude_blog_id)[:9]
@@ -96,27 +68,13 @@ def home(request):
     return render(request, 'basicApp/home.html')
 
 def blogs(request):
-    if not request.session.session_key:
-        request.session.create()
-
     if request.user.is_authenticated:
-        preferred_categories = list(
-            BlogInteraction.objects
-            .filter(user=request.user)
-            .values_list('blog__category', flat=True)
-        )
+        preferred_categories = recommendations.preferred_categories('presence', user=request.user)
     else:
-        preferred_categories = list(
-            BlogInteraction.objects
-            .filter(
-                session_key=request.session.session_key,
-                interaction_type='view'
-            )
-            .values_list('blog__category', flat=True)
+        preferred_categories = recommendations.preferred_categories(
+            'presence', session_key=guests.guest_key(request), types=['view']
         )
 
-    preferred_categories = list(set(preferred_categories))
-
     if preferred_categories:
         all_blogs = Blogs.objects.annotate(
             priority=Case(
@@ -141,32 +99,62 @@ def blogs(request):
         'paginator': paginator,
     })
 
-def blog(request, id):
-    blog_post = get_object_or_404(Blogs, id=id)
+# ---- Blog detail ----
+# The page is answered with 304 while everything it renders is unchanged: the
+# post, its counters, its comments and this reader's related posts (which
+# follow their history, so they are picked before the ETag is computed and
+# reused by the view). Views are recorded by the beacon below, which the page
+# calls on load, so the GET itself writes nothing.
+
+def _blog_version(request, id):
+    if not hasattr(request, '_blog_version'):
+        last_comment = BlogComment.objects.filter(blog=OuterRef('pk')).order_by('-updated').values('updated')[:1]
+        request._blog_version = counters.annotate_fresh(Blogs.objects.filter(id=id)).annotate(
+            last_comment=Subquery(last_comment),
+        ).values_list(
+            'updated', 'fresh_likes_count', 'fresh_dislikes_count', 'comments_count', 'last_comment',
+        ).first()
+    return request._blog_version
 
-    if not request.session.session_key:
-        request.session.create()
 
-    Blogs.objects.filter(id=id).update(views=F('views') + 1)
+def _related_blogs(request, id):
+    if not hasattr(request, '_related_blogs'):
+        if request.user.is_authenticated:
+            related = get_user_recommendations(request.user, id)
+        else:
+            related = get_guest_recommendations(guests.guest_key(request), id)
+        request._related_blogs = list(related)
+    return request._related_blogs
 
-    BlogInteraction.objects.create(
-        user=request.user if request.user.is_authenticated else None,
-        session_key=None if request.user.is_authenticated else request.session.session_key,
-        blog=blog_post,
-        interaction_type='view'
-    )
 
-    blog_post.refresh_from_db()
+def blog_etag(request, id):
+    version = _blog_version(request, id)
+    if version is None:
+        return None
+    updated, likes, dislikes, comments, last_comment = version
+    reader = request.user.pk if request.user.is_authenticated else 'guest'
+    related = ','.join(f'{b.id}@{b.updated.timestamp()}' for b in _related_blogs(request, id))
+    last_comment = last_comment.timestamp() if last_comment else ''
+    raw = f'{id}:{updated.timestamp()}:{likes}:{dislikes}:{comments}:{last_comment}:{reader}:{related}'
+    return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
 
-    if request.user.is_authenticated:
-        related_blogs = get_user_recommendations(request.user, blog_post.id)
-    else:
-        related_blogs = get_guest_recommendations(
-            request.session.session_key,
-            blog_post.id
-        )
 
-    comments = BlogComment.objects.filter(blog=blog_post).order_by('-created')
+def blog_last_modified(request, id):
+    version = _blog_version(request, id)
+    return version[0] if version else None
+
+
+@cache_control(private=True, no_cache=True)
+@ensure_csrf_cookie
+@condition(etag_func=blog_etag, last_modified_func=blog_last_modified)
+def blog(request, id):
+    blog_post = counters.apply_fresh(
+        get_object_or_404(counters.annotate_fresh(Blogs.objects.select_related('author')), id=id)
+    )
+
+    related_blogs = _related_blogs(request, id)
+
+    comments = BlogComment.objects.filter(blog=blog_post).select_related('user').order_by('-created')
 
     user_reaction = None
     if request.user.is_authenticated:
@@ -177,17 +165,41 @@ def blog(request, id):
         if reaction:
             user_reaction = reaction.reaction
 
+    unique_viewers, unique_viewers_today = BlogViewSketch.objects.unique_viewers(blog_id=blog_post.id)
+
     return render(request, 'basicApp/blog.html', {
         'blog': blog_post,
         'related_blogs': related_blogs,
         'comments': comments,
         'user_reaction': user_reaction,
+        'unique_viewers': unique_viewers,
+        'unique_viewers_today': unique_viewers_today,
+    })
+
+
+@ratelimit('view')
+@require_POST
+def record_view(request, id):
+    """View beacon sent by blog.html: count the view and return the fresh counters."""
+    if not counters.increment(id, views=1):
+        return JsonResponse({'error': 'Blog not found'}, status=404)
+
+    BlogInteraction.objects.create(
+        user=request.user if request.user.is_authenticated else None,
+        session_key=None if request.user.is_authenticated else guests.ensure_guest_key(request),
+        blog_id=id,
+        interaction_type='view'
+    )
+    unique_viewers, unique_viewers_today = BlogViewSketch.objects.record(id, visitor_key(request))
+
+    return JsonResponse({
+        'views': counters.fresh_counts(id)['views'],
+        'unique_viewers': unique_viewers,
+        'unique_viewers_today': unique_viewers_today,
     })
 
 from django.http import JsonResponse
-from django.db.models import Q, Count, Sum, Case, When, IntegerField, F
 from django.views.decorators.http import require_http_methods
-from collections import Counter
 import random
 
 @require_http_methods(["GET"])
@@ -196,28 +208,32 @@ def get_next_blogs(request):
     Returns next 5 blogs based on user behavior with category diversity
     """
     current_blog_id = request.GET.get('current_blog_id')
-    offset = int(request.GET.get('offset', 0))
     
     if not current_blog_id:
         return JsonResponse({'error': 'current_blog_id is required'}, status=400)
+    try:
+        current_blog_id = str(Blogs._meta.pk.to_python(current_blog_id))
+        offset = int(request.GET.get('offset', 0))
+    except (ValidationError, ValueError):
+        return JsonResponse({'error': 'current_blog_id must be a blog id and offset a number'}, status=400)
     
-    if not request.session.session_key:
-        request.session.create()
+    # The scroll session remembers what this reader has already seen, so the
+    # offset only tells us whether the page was just (re)loaded.
+    if request.user.is_authenticated:
+        owner = f'user:{request.user.pk}'
+        candidates = lambda n: scroll_candidates_user(request.user, n)
+    else:
+        key = guests.ensure_guest_key(request)
+        owner = f'guest:{key}'
+        candidates = lambda n: scroll_candidates_guest(key, n)
+    
+    blog_ids = scroll.next_blog_ids(owner, current_blog_id, offset == 0, candidates)
+    blogs_by_id = Blogs.objects.select_related('author').in_bulk(blog_ids)
+    recommended_blogs = [blogs_by_id[i] for i in blog_ids if i in blogs_by_id]
     
-    # Get recommendations based on user type
     if request.user.is_authenticated:
-        recommended_blogs = get_scroll_recommendations_user(
-            request.user, 
-            current_blog_id, 
-            offset
-        )
         user_reaction = get_user_reactions(request.user, recommended_blogs)
     else:
-        recommended_blogs = get_scroll_recommendations_guest(
-            request.session.session_key,
-            current_blog_id,
-            offset
-        )
         user_reaction = {}
     
     # Format response
@@ -246,195 +262,113 @@ def get_next_blogs(request):
     })
 
 
-def get_scroll_recommendations_user(user, exclude_blog_id, offset):
+def scroll_candidates_user(user, top_n):
     """
-    Smart recommendations for logged-in users with category diversity
+    Top ``top_n`` scroll candidates for a logged-in user with category diversity
     """
-    # Get user's interaction history with weighted scores
-    interactions = (
-        BlogInteraction.objects
-        .filter(user=user)
-        .values('blog__category')
-        .annotate(
-            score=Sum(
-                Case(
-                    When(interaction_type='view', then=3),
-                    When(interaction_type='like', then=5),
-                    When(interaction_type='comment', then=4),
-                    When(interaction_type='dislike', then=-6),
-                    output_field=IntegerField()
-                )
-            )
-        )
-        .order_by('-score')
-    )
-    
-    # Get top preferred categories (positive scores only)
-    preferred_categories = [
-        i['blog__category'] for i in interactions if i['score'] > 0
-    ]
-    
-    # Get recently viewed categories to add diversity
-    recent_views = BlogInteraction.objects.filter(
-        user=user,
-        interaction_type='view'
-    ).order_by('-created')[:10].values_list('blog__category', flat=True)
-    
-    recent_category_counts = Counter(recent_views)
-    
-    # Identify overrepresented categories (viewed more than 3 times recently)
-    overrepresented = {cat for cat, count in recent_category_counts.items() if count > 3}
-    
-    # Get all available categories
-    all_categories = [choice[0] for choice in Blogs.CATEGORY]
-    
-    # Ensure at least one diverse category (not in top preferences or overrepresented)
-    diverse_categories = [
-        cat for cat in all_categories 
-        if cat not in preferred_categories[:2] and cat not in overrepresented
-    ]
-    
-    # If no diverse categories available, use less preferred ones
-    if not diverse_categories:
-        diverse_categories = [
-            cat for cat in all_categories 
-            if cat not in preferred_categories[:1]
-        ]
+    if top_n <= precompute.get_settings()['TOP_N']:
+        precomputed = precompute.precomputed_ids(precompute.user_key(user.pk))
+        if precomputed is not None:
+            return precomputed
+
+    preferred_categories, diverse_categories = recommendations.scroll_categories_user(user)
     
-    # Build the query with weighted distribution
     # 60% from preferred categories, 40% from diverse categories
     if preferred_categories:
-        preferred_blogs = Blogs.objects.filter(
-            category__in=preferred_categories[:3]
-        ).exclude(id=exclude_blog_id).order_by('-views', '-likes_count')
-        
-        diverse_blogs = Blogs.objects.filter(
-            category__in=diverse_categories[:2]
-        ).exclude(id=exclude_blog_id).order_by('-views', '-likes_count')
-        
-        # Take 3 from preferred and 2 from diverse
-        blogs_list = list(preferred_blogs[offset:offset+3]) + list(diverse_blogs[offset:offset+2])
-        
-        # Shuffle to mix them
-        random.shuffle(blogs_list)
-        
-        return blogs_list[:5]
-    else:
-        # New user - return trending with diversity
-        return Blogs.objects.exclude(
-            id=exclude_blog_id
-        ).order_by('-views', '-likes_count')[offset:offset+5]
+        return precompute.candidate_stream(preferred_categories, diverse_categories, top_n)
+    
+    # New user - return trending
+    return list(
+        Blogs.objects.order_by('-views', '-likes_count').values_list('id', flat=True)[:top_n]
+    )
 
 
-def get_scroll_recommendations_guest(session_key, exclude_blog_id, offset):
+def scroll_candidates_guest(session_key, top_n):
     """
-    Smart recommendations for guest users with category diversity
+    Top ``top_n`` scroll candidates for a guest with category diversity
     """
-    # Get recent interactions
-    recent_interactions = BlogInteraction.objects.filter(
-        session_key=session_key
-    ).order_by('-created')[:15]
+    categories = recommendations.scroll_categories_guest(session_key)
     
-    if not recent_interactions:
-        # New guest - return trending blogs with diverse categories
-        return get_diverse_trending_blogs(exclude_blog_id, offset)
+    if categories is None or not categories[0]:
+        # New guest - return trending blogs with diverse categories first
+        return diverse_trending_ids(None, top_n)
     
-    # Analyze guest preferences
-    category_scores = {}
-    for interaction in recent_interactions:
-        cat = interaction.blog.category
-        if cat not in category_scores:
-            category_scores[cat] = 0
-        
-        if interaction.interaction_type == 'view':
-            category_scores[cat] += 3
-        elif interaction.interaction_type == 'like':
-            category_scores[cat] += 5
-        elif interaction.interaction_type == 'comment':
-            category_scores[cat] += 4
-        elif interaction.interaction_type == 'dislike':
-            category_scores[cat] -= 6
+    preferred_categories, diverse_categories = categories
+    if top_n <= precompute.get_settings()['TOP_N']:
+        precomputed = precompute.precomputed_ids(
+            precompute.guest_key(preferred_categories, diverse_categories)
+        )
+        if precomputed is not None:
+            return precomputed
     
-    # Get top categories
-    sorted_categories = sorted(
-        category_scores.items(), 
-        key=lambda x: x[1], 
-        reverse=True
+    return precompute.candidate_stream(preferred_categories, diverse_categories, top_n)
+
+
+TRENDING_CACHED = 10
+
+
+def _trending_ids_by_category():
+    """
+    Ids of the two most viewed blogs of every category plus the overall top
+    ten, cached so that a burst of new guests doesn't run the per-category
+    queries once each.
+    """
+    by_category = {}
+    for category, _ in Blogs.CATEGORY:
+        by_category[category] = list(
+            Blogs.objects.filter(category=category)
+            .order_by('-views', '-likes_count')
+            .values_list('id', flat=True)[:2]
+        )
+    overall = list(Blogs.objects.order_by('-views').values_list('id', flat=True)[:TRENDING_CACHED])
+    return by_category, overall
+
+
+def diverse_trending_ids(exclude_blog_id, top_n=5):
+    """
+    Trending blog ids, the first five from different categories
+    """
+    by_category, overall = get_or_compute(
+        'trending', 'diverse', _trending_ids_by_category, timeout=60
     )
-    preferred_categories = [cat for cat, score in sorted_categories if score > 0][:3]
-    
-    # Get recent view categories for diversity check
-    recent_views = [
-        i.blog.category for i in recent_interactions 
-        if i.interaction_type == 'view'
-    ][:8]
-    recent_category_counts = Counter(recent_views)
-    overrepresented = {cat for cat, count in recent_category_counts.items() if count > 2}
-    
-    # Get diverse categories
-    all_categories = [choice[0] for choice in Blogs.CATEGORY]
-    diverse_categories = [
-        cat for cat in all_categories 
-        if cat not in preferred_categories[:2] and cat not in overrepresented
-    ]
-    
-    if not diverse_categories:
-        diverse_categories = [
-            cat for cat in all_categories 
-            if cat not in preferred_categories[:1]
-        ]
-    
-    # Build mixed query
-    if preferred_categories:
-        preferred_blogs = Blogs.objects.filter(
-            category__in=preferred_categories
-        ).exclude(id=exclude_blog_id).order_by('-views', '-likes_count')
-        
-        diverse_blogs = Blogs.objects.filter(
-            category__in=diverse_categories[:2]
-        ).exclude(id=exclude_blog_id).order_by('-views')
-        
-        blogs_list = list(preferred_blogs[offset:offset+3]) + list(diverse_blogs[offset:offset+2])
-        random.shuffle(blogs_list)
-        
-        return blogs_list[:5]
-    else:
-        return get_diverse_trending_blogs(exclude_blog_id, offset)
+    exclude_blog_id = str(exclude_blog_id)
+
+    blog_ids = []
+    for category, _ in Blogs.CATEGORY:
+        candidates = [i for i in by_category.get(category, []) if str(i) != exclude_blog_id]
+        if candidates:
+            blog_ids.append(candidates[0])
+
+        if len(blog_ids) >= 5:
+            break
+
+    # Fill with overall trending, beyond the cached top ten straight from the database
+    if top_n > TRENDING_CACHED:
+        overall = Blogs.objects.order_by('-views').values_list('id', flat=True)[:top_n]
+    for blog_id in overall:
+        if len(blog_ids) >= top_n:
+            break
+        if blog_id not in blog_ids and str(blog_id) != exclude_blog_id:
+            blog_ids.append(blog_id)
+
+    return blog_ids[:top_n]
 
 
 def get_diverse_trending_blogs(exclude_blog_id, offset):
     """
     Get trending blogs ensuring category diversity
     """
-    all_categories = [choice[0] for choice in Blogs.CATEGORY]
-    blogs = []
-    
-    for category in all_categories:
-        blog = Blogs.objects.filter(
-            category=category
-        ).exclude(id=exclude_blog_id).order_by('-views', '-likes_count').first()
-        
-        if blog:
-            blogs.append(blog)
-        
-        if len(blogs) >= 5:
-            break
-    
-    # If not enough diverse blogs, fill with trending
-    if len(blogs) < 5:
-        additional = Blogs.objects.exclude(
-            id__in=[b.id for b in blogs]
-        ).exclude(id=exclude_blog_id).order_by('-views')[:5-len(blogs)]
-        blogs.extend(additional)
-    
+    blog_ids = diverse_trending_ids(exclude_blog_id)
+    blogs = Blogs.objects.select_related('author').in_bulk(blog_ids)
+    blogs = [blogs[i] for i in blog_ids if i in blogs]
     return blogs[offset:offset+5]
 
 
 def get_user_reactions(user, blogs):
     """
-    Get user's reactions for a list of blogs
+    Get user's reactions for a list of blogs (or blog ids)
     """
-    blog_ids = [blog.id for blog in blogs]
+    blog_ids = [getattr(blog, 'id', blog) for blog in blogs]
     reactions = BlogReaction.objects.filter(
         user=user,
         blog_id__in=blog_ids
@@ -449,28 +383,11 @@ def scrollView(request):
     # Get initial blog based on user preferences
     if request.user.is_authenticated:
         # Get user's most preferred category
-        interactions = (
-            BlogInteraction.objects
-            .filter(user=request.user)
-            .values('blog__category')
-            .annotate(
-                score=Sum(
-                    Case(
-                        When(interaction_type='view', then=3),
-                        When(interaction_type='like', then=5),
-                        When(interaction_type='comment', then=4),
-                        When(interaction_type='dislike', then=-6),
-                        output_field=IntegerField()
-                    )
-                )
-            )
-            .order_by('-score')
-            .first()
-        )
+        top_category = recommendations.preferred_categories('scroll', user=request.user, top=1)
         
-        if interactions and interactions['score'] > 0:
+        if top_category:
             initial_blog = Blogs.objects.filter(
-                category=interactions['blog__category']
+                category=top_category[0]
             ).order_by('-views').first()
         else:
             initial_blog = Blogs.objects.order_by('-views').first()
@@ -538,10 +455,14 @@ def editBlog(request, id):
             blog.tags = request.POST.get('tags', '')
 
             # Only update image if a new one is uploaded
+            replaced = None
             if request.FILES.get('featureImage'):
+                replaced = blog.featureImage.name
                 blog.featureImage = request.FILES.get('featureImage')
 
             blog.save()
+            if replaced and replaced != blog.featureImage.name:
+                transaction.on_commit(lambda: release([replaced]))
             messages.success(request, 'Blog updated successfully!')
             return redirect('manageBlog')
         except Exception as e:
@@ -556,9 +477,11 @@ def editBlog(request, id):
 def deleteBlog(request, id):
     if request.method == 'POST':
         try:
-            blog = Blogs.objects.get(id=id)
-            blog.delete()
-            messages.success(request, 'Blog deleted successfully!')
+            blog = Blogs.objects.get(id=id, author=request.user)
+            if deletion.delete_blogs([blog.id]):
+                messages.success(request, 'Blog is being deleted, it will disappear shortly.')
+            else:
+                messages.success(request, 'Blog deleted successfully!')
         except Blogs.DoesNotExist:
             messages.error(request, 'Blog not found!')
         except Exception as e:
@@ -566,6 +489,26 @@ def deleteBlog(request, id):
 
     return redirect('manageBlog')
 
+@login_required(login_url='/accounts/login/')
+@require_POST
+def deleteBlogs(request):
+    """Delete the posts ticked in manageBlog (only the user's own)."""
+    try:
+        blog_ids = list(
+            Blogs.objects.filter(id__in=request.POST.getlist('blog_ids'), author=request.user)
+            .values_list('id', flat=True)
+        )
+    except ValidationError:
+        blog_ids = []
+    if not blog_ids:
+        messages.error(request, 'No blogs selected!')
+    elif deletion.delete_blogs(blog_ids):
+        messages.success(request, f'{len(blog_ids)} blogs are being deleted, they will disappear shortly.')
+    else:
+        messages.success(request, f'{len(blog_ids)} blogs deleted successfully!')
+    return redirect('manageBlog')
+
+@ratelimit('reaction')
 @login_required(login_url='/accounts/login/')
 def toggle_reaction(request, id, reaction_type):
     """Handle like/dislike via AJAX"""
@@ -585,6 +528,7 @@ def toggle_reaction(request, id, reaction_type):
                 user_reaction = None
             else:
                 # Switch like <-> dislike
+                existing._previous_reaction = existing.reaction
                 existing.reaction = reaction_type
                 existing.save()
                 user_reaction = reaction_type
@@ -599,7 +543,7 @@ def toggle_reaction(request, id, reaction_type):
             interaction_type=reaction_type
         )
 
-        blog.refresh_from_db()
+        counters.refresh_counts(blog)
 
         return JsonResponse({
             "success": True,
@@ -611,6 +555,7 @@ def toggle_reaction(request, id, reaction_type):
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=400)
 
+@ratelimit('comment')
 @login_required(login_url='/accounts/login/')
 def add_comment(request, id):
     """Handle comment submission via AJAX"""
@@ -675,3 +620,97 @@ def delete_comment(request, comment_id):
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=400)
     
+
+
+# ---- Title autocomplete ----
+
+@require_GET
+def autocomplete_titles(request):
+    """Most popular posts whose title, title words or tags start with ``?q=``, from memory."""
+    started = time.perf_counter()
+    try:
+        limit = min(max(int(request.GET.get('limit', 8)), 1), autocomplete.MAX_LIMIT)
+    except ValueError:
+        return JsonResponse({"error": "limit must be a number"}, status=400)
+    results = autocomplete.index.search(request.GET.get('q', '')[:100], limit)
+    return JsonResponse({
+        'results': [
+            {'id': str(blog_id), 'title': title, 'url': reverse('blog', args=[blog_id])}
+            for blog_id, title in results
+        ],
+        'took_ms': round((time.perf_counter() - started) * 1000, 3),
+        'index': autocomplete.index.stats(),
+    })
+
+
+# ---- Live counts ----
+
+MAX_COUNT_IDS = 50
+
+
+def _blog_ids_param(request, limit):
+    """The distinct blog ids of ``?ids=a,b,c``; raises ``ValidationError`` unless 1 to ``limit`` valid ids."""
+    blog_ids = list(dict.fromkeys(
+        str(Blogs._meta.pk.to_python(value)) for value in request.GET.get('ids', '').split(',') if value
+    ))
+    if not blog_ids or len(blog_ids) > limit:
+        raise ValidationError(f'Pass 1 to {limit} blog ids')
+    return blog_ids
+
+
+@require_GET
+def blog_counts(request):
+    """
+    Fresh counters of already rendered cards, for ``?ids=`` (at most
+    ``MAX_COUNT_IDS``), with the reader's reaction; blog bodies are not sent.
+    """
+    try:
+        blog_ids = _blog_ids_param(request, MAX_COUNT_IDS)
+    except ValidationError as e:
+        return JsonResponse({"error": e.messages[0]}, status=400)
+
+    counts = counters.cached_counts(blog_ids)
+    reactions = get_user_reactions(request.user, counts) if request.user.is_authenticated else {}
+    return JsonResponse({
+        'success': True,
+        'counts': {
+            blog_id: {**values, 'user_reaction': reactions.get(blog_id)}
+            for blog_id, values in counts.items()
+        },
+    })
+
+
+@require_GET
+async def live_counts(request):
+    """Server-Sent Events with the counts of the blogs in ``?ids=``, see ``basicApp.live``."""
+    try:
+        blog_ids = _blog_ids_param(request, live.MAX_BLOGS_PER_STREAM)
+    except ValidationError as e:
+        return JsonResponse({"error": e.messages[0]}, status=400)
+
+    if not isinstance(request, ASGIRequest):
+        # A WSGI worker cannot hold the stream open. 204 tells EventSource to
+        # stop for good instead of reconnecting (and querying) every few seconds.
+        return HttpResponse(status=204)
+
+    snapshot = [
+        {'id': str(blog_id), 'likes': likes, 'dislikes': dislikes, 'comments': comments}
+        async for blog_id, likes, dislikes, comments in counters.annotate_fresh(
+            Blogs.objects.filter(id__in=blog_ids)
+        ).values_list('id', 'fresh_likes_count', 'fresh_dislikes_count', 'comments_count')
+    ]
+    response = StreamingHttpResponse(live.event_stream(blog_ids, snapshot), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@staff_member_required
+def monitoring_stats(request):
+    """Rate-limit, cache, live-stream and autocomplete counters of this process, for monitoring."""
+    return JsonResponse({
+        'ratelimit': get_ratelimit_stats(),
+        'cache': get_cache_stats(),
+        'live': live.broadcaster.get_stats(),
+        'autocomplete': autocomplete.index.stats(),
+    })